@@ -1,44 +1,292 @@
-from flask import Flask, redirect, render_template, jsonify, request, url_for
+from flask import Flask, Response, redirect, render_template, jsonify, request, session, url_for
 from flask_login import LoginManager, current_user, login_required
-from datetime import datetime
-import requests, os, json
-from extensions import db, bcrypt
+from werkzeug.middleware.proxy_fix import ProxyFix
+from datetime import datetime, timedelta, timezone
+import os, json
+from extensions import db, bcrypt, migrate, chat_hub, profile_index, user_cache, password_hasher, login_limiter, assets, request_metrics
+import db_config
+import availability
+from caching import TTLCache
+from role_serving import RoleService, ServingOverloaded
+from message_writer import GroupCommitWriter, WriterOverloaded
+from password_hashing import HashingOverloaded
+import role_model
 from client_routes import client_bp, Client
-from freelancer_routes import freelancer_bp, Freelancer
-import joblib
-import os, json, joblib
-import sqlite3
+import freelancer_search
+from freelancer_routes import freelancer_bp, Freelancer, FreelancerRole, default_price, default_rating, parse_roles
+import os, json
+import uuid
+import base64
+import hashlib
+import gzip
+import threading
+import re
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+import time
+import click
 
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = db_config.database_uri()
 app.config['SECRET_KEY'] = 'b7c4f2e9a1dd4c0fb2e8a6d7c3f9b1a2'
 
-db.init_app(app)
+app.config['CHAT_PAGE_SIZE'] = 50
+app.config['CHAT_MAX_PAGE_SIZE'] = 200
+app.config['CHAT_STREAM_TIMEOUT'] = 55
+app.config['CHAT_STREAM_KEEPALIVE'] = 15
+# Concurrent sends can commit and publish out of id order, so a (re)connecting stream also
+# replays this many seconds of history; the page drops ids it has already rendered.
+app.config['CHAT_STREAM_LOOKBACK'] = int(os.environ.get('CHAT_STREAM_LOOKBACK', 30))
+# Each open stream holds a gunicorn thread; keep the rest (--threads 32) for ordinary requests.
+# Streams over the cap get 503 and the page falls back to polling.
+app.config['CHAT_MAX_STREAMS'] = int(os.environ.get('CHAT_MAX_STREAMS', 16))
+app.config['CHAT_GROUP_COMMIT'] = os.environ.get('CHAT_GROUP_COMMIT', '0') == '1'
+app.config['CHAT_GROUP_COMMIT_MAX_BATCH'] = int(os.environ.get('CHAT_GROUP_COMMIT_MAX_BATCH', 64))
+app.config['CHAT_GROUP_COMMIT_WAIT_MS'] = float(os.environ.get('CHAT_GROUP_COMMIT_WAIT_MS', 0))
+app.config['CHAT_GROUP_COMMIT_QUEUE'] = int(os.environ.get('CHAT_GROUP_COMMIT_QUEUE', 1024))
+app.config['CHAT_GROUP_COMMIT_TIMEOUT'] = float(os.environ.get('CHAT_GROUP_COMMIT_TIMEOUT', 10))
+app.config['CHAT_RETENTION_DAYS'] = int(os.environ.get('CHAT_RETENTION_DAYS', 365))
+
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+# Number of reverse proxies in front of gunicorn, so request.remote_addr is the client for the
+# login and availability limiters. Heroku (which sets DYNO) puts one router in front of every dyno;
+# without this all visitors would share the router's address and one rate-limit bucket.
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', 1 if 'DYNO' in os.environ else 0))
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
+db_config.init_app(app, db)
 bcrypt.init_app(app)
+password_hasher.init_app(app)
+login_limiter.init_app(app)
+availability.init_app(app)
+assets.init_app(app)
+request_metrics.init_app(app)
+migrate.init_app(app, db, include_object=freelancer_search.include_object)
+chat_hub.init_app(app)
+profile_index.init_app(app)
 login_manager = LoginManager(app)
 
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 4096))
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+user_cache.maxsize = app.config['USER_CACHE_SIZE']
+user_cache.ttl = app.config['USER_CACHE_TTL']
+
 app.register_blueprint(client_bp, url_prefix="/client")
 app.register_blueprint(freelancer_bp, url_prefix="/freelancer")
 
 
+USER_MODELS = {"client": Client, "freelancer": Freelancer}
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    user = db.session.get(Client, int(user_id))
-    if not user:
-        user = db.session.get(Freelancer, int(user_id))
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        model, values = cached
+        # Rebuild the row from cached column values and attach it without a query.
+        user = model(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    kind, _, key = user_id.rpartition(":")
+    model = USER_MODELS.get(kind)
+    # Sessions issued before ids were typed ("5") cannot tell a client from a freelancer
+    # with the same id; treat them as signed out so those users log in again.
+    if model is None or not key.isdigit():
+        return None
+    user = db.session.get(model, int(key))
+    if user is not None:
+        values = {c.key: getattr(user, c.key) for c in db.inspect(type(user)).column_attrs}
+        user_cache.set(user.get_id(), (type(user), values))
     return user
 
 
 
+class Conversation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    client_id = db.Column(db.Integer, nullable=False)
+    freelancer_id = db.Column(db.Integer, nullable=False)
+    last_message_id = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('client_id', 'freelancer_id', name='uq_conversation_client_freelancer'),
+        db.Index('ix_conversation_client_updated', 'client_id', 'updated_at'),
+        db.Index('ix_conversation_freelancer_updated', 'freelancer_id', 'updated_at'),
+    )
+
+    def has_participant(self, user):
+        if isinstance(user, Freelancer):
+            return self.freelancer_id == user.id
+        return self.client_id == user.id
+
+
+class ConversationMember(db.Model):
+    # One summary row per participant, kept up to date by send() and reads.
+    conversation_id = db.Column(db.Integer, primary_key=True)
+    role = db.Column(db.String(10), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    last_message_id = db.Column(db.Integer)
+    last_read_message_id = db.Column(db.Integer)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_conversation_member_user_updated', 'role', 'user_id', 'updated_at'),
+    )
+
+
 class Message(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     conv_id = db.Column(db.Integer)
-    user = db.Column(db.String(50))
-    receiver_id = db.Column(db.String(36))
+    user = db.Column(db.String(50), index=True)
+    receiver_id = db.Column(db.String(36), index=True)
     from_me = db.Column(db.Boolean)
     text = db.Column(db.String(500))
+    # Display string written before created_at existed; no longer read or written.
     time = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.Index('ix_message_conv_id_id', 'conv_id', 'id'),
+        db.Index('ix_message_conv_id_created_at', 'conv_id', 'created_at'),
+    )
+
+
+class RolePrediction(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    session_key = db.Column(db.String(32), nullable=False)
+    need_statement = db.Column(db.String(1000))
+    roles = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_role_prediction_session_id', 'session_key', 'id'),
+    )
+
+
+def prediction_session_key():
+    if "prediction_session" not in session:
+        session["prediction_session"] = uuid.uuid4().hex
+    return session["prediction_session"]
+
+
+def parse_utc(value):
+    # Naive datetimes are taken as UTC, like the stored columns.
+    stamp = datetime.fromisoformat(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return stamp
+
+
+def utc_isoformat(stamp):
+    return stamp.isoformat(timespec="microseconds") + "Z"
+
+
+def display_time(stamp):
+    # Chat bubbles keep showing the server's local clock, as the old strings did.
+    return stamp.replace(tzinfo=timezone.utc).astimezone().strftime("%I:%M %p").lstrip("0")
+
+
+def touch_conversation(conv_id, message, sender_role):
+    db.session.flush()
+    Conversation.query.filter_by(id=conv_id).update(
+        {"last_message_id": message.id, "updated_at": datetime.utcnow()}
+    )
+    record_messages(db.session, [{"conv": conv_id, "sender": sender_role, "message_id": message.id}])
+
+
+def record_messages(conn, events):
+    # events are {"conv", "sender", "message_id"} in message id order; executemany
+    # applies them in that order, so several messages per batch count correctly.
+    members = ConversationMember.__table__
+    now = datetime.utcnow()
+    conn.execute(
+        db.update(members)
+        .where(members.c.conversation_id == db.bindparam("conv"), members.c.role == db.bindparam("sender"))
+        .values(last_message_id=db.bindparam("message_id"), last_read_message_id=db.bindparam("message_id"),
+                unread_count=0, updated_at=now),
+        events,
+    )
+    conn.execute(
+        db.update(members)
+        .where(members.c.conversation_id == db.bindparam("conv"), members.c.role != db.bindparam("sender"))
+        .values(last_message_id=db.bindparam("message_id"), unread_count=members.c.unread_count + 1, updated_at=now),
+        events,
+    )
+
+
+def mark_read(conv_id, user, up_to_id):
+    members = ConversationMember.__table__
+    last_read = db.session.execute(
+        db.select(members.c.last_read_message_id)
+        .where(members.c.conversation_id == conv_id, members.c.role == user.role)
+    ).first()
+    # Checked first so polls that bring nothing new never take SQLite's write lock.
+    if last_read is None or not up_to_id or (last_read[0] or 0) >= up_to_id:
+        return
+    # Message.user is a bare id that a client and a freelancer can share, so count by id instead:
+    # sending moves the sender's own last_read_message_id to that message, and it is still below
+    # up_to_id here, so every message after up_to_id came from the other participant.
+    unread = (
+        db.select(db.func.count()).select_from(Message)
+        .where(Message.conv_id == conv_id, Message.id > up_to_id)
+        .scalar_subquery()
+    )
+    # One statement, like the increments in record_messages, so a batch committing
+    # concurrently can neither lose its increment nor undo this read.
+    db.session.execute(
+        db.update(members)
+        .where(members.c.conversation_id == conv_id, members.c.role == user.role,
+               db.func.coalesce(members.c.last_read_message_id, 0) < up_to_id)
+        .values(last_read_message_id=up_to_id,
+                unread_count=db.case((db.func.coalesce(members.c.last_message_id, 0) <= up_to_id, 0), else_=unread))
+    )
+    db.session.commit()
+
+
+def write_messages(rows):
+    # One transaction (and one fsync) for a whole batch of /send messages.
+    messages, conversations = Message.__table__, Conversation.__table__
+    with db.engine.begin() as conn:
+        ids = conn.execute(
+            db.insert(messages).returning(messages.c.id, sort_by_parameter_order=True),
+            [{k: v for k, v in row.items() if k != "sender_role"} for row in rows],
+        ).scalars().all()
+        last_ids = {}
+        for row, message_id in zip(rows, ids):
+            last_ids[row["conv_id"]] = max(last_ids.get(row["conv_id"], 0), message_id)
+        conn.execute(
+            db.update(conversations)
+            .where(conversations.c.id == db.bindparam("conv"))
+            .values(last_message_id=db.bindparam("last_id"), updated_at=datetime.utcnow()),
+            [{"conv": conv_id, "last_id": message_id} for conv_id, message_id in last_ids.items()],
+        )
+        record_messages(conn, [{"conv": row["conv_id"], "sender": row["sender_role"], "message_id": message_id}
+                               for row, message_id in zip(rows, ids)])
+    return ids
+
+
+def publish_messages(rows, ids):
+    # Runs on the writer thread right after the commit, so events leave in id order.
+    for row, message_id in zip(rows, ids):
+        chat_hub.publish(row["conv_id"], {"id": message_id, "text": row["text"],
+                                          "time": display_time(row["created_at"]),
+                                          "created_at": utc_isoformat(row["created_at"]), "user": str(row["user"])})
+
+
+message_writer = None
+if app.config['CHAT_GROUP_COMMIT']:
+    message_writer = GroupCommitWriter(
+        write_messages,
+        app=app,
+        max_batch=app.config['CHAT_GROUP_COMMIT_MAX_BATCH'],
+        max_wait=app.config['CHAT_GROUP_COMMIT_WAIT_MS'] / 1000,
+        max_queue=app.config['CHAT_GROUP_COMMIT_QUEUE'],
+        on_commit=publish_messages,
+    )
 
 
 @app.route('/start_chat/<int:freelancer_id>')
@@ -47,77 +295,123 @@ def start_chat(freelancer_id):
     if not isinstance(current_user, Client):
         return redirect(url_for('client_bp.login'))
 
-    conv = (
-        Message.query.filter_by(receiver_id=str(freelancer_id))
-        .order_by(Message.conv_id.asc())
-        .first()
-    )
-    if conv:
-        conv_id = conv.conv_id
+    conv = Conversation.query.filter_by(client_id=current_user.id, freelancer_id=freelancer_id).first()
+    if not conv:
+        conv = Conversation(client_id=current_user.id, freelancer_id=freelancer_id)
+        db.session.add(conv)
+        try:
+            db.session.flush()
+            db.session.add_all([
+                ConversationMember(conversation_id=conv.id, role="client", user_id=current_user.id),
+                ConversationMember(conversation_id=conv.id, role="freelancer", user_id=freelancer_id),
+            ])
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            conv = Conversation.query.filter_by(client_id=current_user.id, freelancer_id=freelancer_id).one()
+        else:
+            msg = Message(
+                conv_id=conv.id,
+                user=current_user.id,
+                receiver_id=str(freelancer_id),
+                from_me=True,
+                text="Started a new conversation",
+            )
+            db.session.add(msg)
+            touch_conversation(conv.id, msg, "client")
+            db.session.commit()
+
+    return redirect(url_for('chat_page', conv=conv.id, user=current_user.id))
+
+
+DEFAULT_AVATAR = "/static/img/search/male-pfp.webp"
+
+
+def list_conversations(user_id, counterpart_model):
+    if counterpart_model is Freelancer:
+        own_role, other_column = "client", Conversation.freelancer_id
     else:
-        max_conv = db.session.query(db.func.max(Message.conv_id)).scalar() or 0
-        conv_id = max_conv + 1
-        msg = Message(
-            conv_id=conv_id,
-            user=current_user.id,
-            receiver_id=str(freelancer_id),
-            from_me=True,
-            text="Started a new conversation",
-            time=datetime.now().strftime("%I:%M %p").lstrip("0"),
+        own_role, other_column = "freelancer", Conversation.client_id
+
+    rows = db.session.execute(
+        db.select(
+            ConversationMember.conversation_id.label("id"),
+            ConversationMember.unread_count,
+            other_column.label("other_id"),
+            counterpart_model.id.label("counterpart_id"),
+            counterpart_model.first_name,
+            counterpart_model.last_name,
+            Message.text,
+            Message.created_at,
         )
-        db.session.add(msg)
-        db.session.commit()
+        .join(Conversation, Conversation.id == ConversationMember.conversation_id)
+        .outerjoin(counterpart_model, counterpart_model.id == other_column)
+        .outerjoin(Message, Message.id == ConversationMember.last_message_id)
+        .where(ConversationMember.role == own_role, ConversationMember.user_id == int(user_id))
+        .order_by(ConversationMember.updated_at.desc())
+    ).all()
+
+    return [
+        {
+            "id": row.id,
+            "name": f"{row.first_name or ''} {row.last_name or ''}".strip() if row.counterpart_id else None,
+            "avatar": DEFAULT_AVATAR,
+            "last_message": row.text,
+            "timestamp": display_time(row.created_at) if row.created_at else None,
+            "unread": row.unread_count,
+            "unique_id": str(row.other_id),
+            "messages": []
+        }
+        for row in rows
+    ]
+
+
+def page_limit(limit=None):
+    if not limit or limit < 1:
+        return app.config['CHAT_PAGE_SIZE']
+    return min(limit, app.config['CHAT_MAX_PAGE_SIZE'])
 
-    return redirect(url_for('chat_page', conv=conv_id, user=current_user.id))
+
+def serialize_message(m, current_user_id):
+    return {"id": m.id, "text": m.text, "time": display_time(m.created_at), "created_at": utc_isoformat(m.created_at),
+            "from_me": str(m.user) == str(current_user_id), "user": m.user}
+
+
+def load_messages(conv_id, current_user_id, before_id=None, limit=None, before=None):
+    limit = page_limit(limit)
+    query = Message.query.filter(Message.conv_id == conv_id)
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    if before is not None:
+        # Jumping back in time walks ix_message_conv_id_created_at instead of ids.
+        query = query.filter(Message.created_at < before).order_by(Message.created_at.desc(), Message.id.desc())
+    else:
+        query = query.order_by(Message.id.desc())
+    msgs = query.limit(limit + 1).all()
+
+    has_more = len(msgs) > limit
+    msgs = msgs[:limit]
+    msgs.reverse()
+    return [serialize_message(m, current_user_id) for m in msgs], has_more
 
 
 @app.route("/chat_page")
 @login_required
 def chat_page():
-    current_user_id = str(current_user.id)
     user_type = "freelancer" if isinstance(current_user, Freelancer) else "client"
+    counterpart_model = Client if user_type == "freelancer" else Freelancer
 
-    conv_ids = db.session.query(Message.conv_id).distinct().all()
-    conversations = []
-
-    for cid_tuple in conv_ids:
-        cid = cid_tuple[0]
-        msgs = Message.query.filter_by(conv_id=cid).all()
-        if not msgs:
-            continue
-
-        other_user_id = None
-        for m in msgs:
-            if str(m.user) != current_user_id and m.user != "Server":
-                other_user_id = m.user
-                break
-            elif str(m.receiver_id) != current_user_id and m.receiver_id != "Server":
-                other_user_id = m.receiver_id
-                break
-
-        if user_type == "freelancer":
-            other = Client.query.get(other_user_id)
-        else:
-            other = Freelancer.query.get(other_user_id)
-
-        name = f"{getattr(other,'first_name','')} {getattr(other,'last_name','')}".strip() if other else f"Conversation {cid}"
-        avatar = "/static/img/search/male-pfp.webp"
-        last_msg = msgs[-1]
-
-        conversations.append({
-            "id": cid,
-            "name": name,
-            "avatar": avatar,
-            "last_message": last_msg.text,
-            "timestamp": last_msg.time,
-            "unique_id": other_user_id,
-            "messages": [
-                {"text": m.text, "time": m.time, "from_me": m.user == current_user_id, "user": m.user}
-                for m in msgs
-            ]
-        })
+    conversations = list_conversations(current_user.id, counterpart_model)
+    for c in conversations:
+        if not c["name"]:
+            c["name"] = f"Conversation {c['id']}"
 
     active_conv_id = conversations[0]['id'] if conversations else 0
+    if conversations:
+        conversations[0]["messages"], conversations[0]["has_more"] = load_messages(active_conv_id, current_user.id)
+        if conversations[0]["messages"]:
+            mark_read(active_conv_id, current_user, conversations[0]["messages"][-1]["id"])
+            conversations[0]["unread"] = 0
 
     template = "chat/freelancer_chat.html" if user_type == "freelancer" else "chat/client_chat.html"
 
@@ -133,55 +427,16 @@ def freelancer_chat():
     if not isinstance(current_user, Freelancer):
         return redirect(url_for('freelancer_bp.login'))
 
-    current_freelancer_id = str(current_user.id)
-    conv_ids = db.session.query(Message.conv_id).distinct().all()
-    conversations = []
-
-    for cid_tuple in conv_ids:
-        cid = cid_tuple[0]
-        msgs = Message.query.filter_by(conv_id=cid).all()
-        if not msgs:
-            continue
-
-        if not any(
-            str(m.user) == current_freelancer_id or str(m.receiver_id) == current_freelancer_id
-            for m in msgs
-        ):
-            continue
-
-        client_id = None
-        for m in msgs:
-            if str(m.user) != current_freelancer_id and Client.query.get(int(m.user)):
-                client_id = m.user
-                break
-            elif str(m.receiver_id) != current_freelancer_id and Client.query.get(int(m.receiver_id)):
-                client_id = m.receiver_id
-                break
-
-        client = Client.query.get(int(client_id)) if client_id else None
-        if not client:
-            continue
-
-        name = f"{client.first_name} {client.last_name}".strip() or f"Client {client_id}"
-        avatar = "/static/img/search/male-pfp.webp"
-        last_msg = msgs[-1]
-
-        conversations.append({
-            "id": cid,
-            "name": name,
-            "avatar": avatar,
-            "last_message": last_msg.text,
-            "timestamp": last_msg.time,
-            "unique_id": client_id,
-            "messages": [
-                {
-                    "text": m.text,
-                    "time": m.time,
-                    "from_me": str(m.user) == current_freelancer_id,
-                    "user": m.user
-                } for m in msgs
-            ]
-        })
+    conversations = [c for c in list_conversations(current_user.id, Client) if c["name"] is not None]
+    for c in conversations:
+        if not c["name"]:
+            c["name"] = f"Client {c['unique_id']}"
+
+    if conversations:
+        conversations[0]["messages"], conversations[0]["has_more"] = load_messages(conversations[0]["id"], current_user.id)
+        if conversations[0]["messages"]:
+            mark_read(conversations[0]["id"], current_user, conversations[0]["messages"][-1]["id"])
+            conversations[0]["unread"] = 0
 
     return render_template(
         "chat/freelancer_chat.html",
@@ -195,51 +450,175 @@ def freelancer_chat():
 @app.route("/chat/<int:conv_id>")
 @login_required
 def get_conversation(conv_id):
-    msgs = Message.query.filter_by(conv_id=conv_id).all()
-    if not msgs:
+    after_id = request.args.get("after_id", type=int)
+    before_id = request.args.get("before_id", type=int)
+    since = request.args.get("since", type=parse_utc)
+    before = request.args.get("before", type=parse_utc)
+    limit = page_limit(request.args.get("limit", type=int))
+
+    conv = db.session.get(Conversation, conv_id)
+    if conv is None or not conv.has_participant(current_user):
         return jsonify({"error": "No messages found"}), 404
+    last_id = conv.last_message_id or 0
+
+    etag = f"{conv_id}-{after_id or 0}-{before_id or 0}-{since or 0}-{before or 0}-{limit}-{last_id}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
 
     current_user_id = str(current_user.id)
-    other_id = None
-    if isinstance(current_user, Freelancer):
-        for m in msgs:
-            if str(m.user) != current_user_id and Client.query.get(int(m.user)):
-                other_id = m.user
-                break
-            elif str(m.receiver_id) != current_user_id and Client.query.get(int(m.receiver_id)):
-                other_id = m.receiver_id
-                break
-        other_user = Client.query.get(int(other_id)) if other_id else None
+
+    if after_id is not None:
+        msgs = (
+            Message.query.filter(Message.conv_id == conv_id, Message.id > after_id)
+            .order_by(Message.id.asc())
+            .limit(limit)
+            .all()
+        )
+        data = {
+            "id": conv_id,
+            "last_id": last_id,
+            "messages": [serialize_message(m, current_user_id) for m in msgs]
+        }
+    elif since is not None:
+        msgs = (
+            Message.query.filter(Message.conv_id == conv_id, Message.created_at > since)
+            .order_by(Message.created_at.asc(), Message.id.asc())
+            .limit(limit)
+            .all()
+        )
+        data = {
+            "id": conv_id,
+            "last_id": last_id,
+            "messages": [serialize_message(m, current_user_id) for m in msgs]
+        }
+    elif before_id is not None or before is not None:
+        messages, has_more = load_messages(conv_id, current_user_id, before_id, limit, before)
+        data = {
+            "id": conv_id,
+            "has_more": has_more,
+            "messages": messages
+        }
     else:
-        for m in msgs:
-            if str(m.user) != current_user_id and Freelancer.query.get(int(m.user)):
-                other_id = m.user
-                break
-            elif str(m.receiver_id) != current_user_id and Freelancer.query.get(int(m.receiver_id)):
-                other_id = m.receiver_id
-                break
-        other_user = Freelancer.query.get(int(other_id)) if other_id else None
-
-    name = f"{getattr(other_user,'first_name','')} {getattr(other_user,'last_name','')}".strip() if other_user else f"Conversation {conv_id}"
-    avatar = "/static/img/search/male-pfp.webp"
-
-    data = {
-        "id": conv_id,
-        "name": name,
-        "avatar": avatar,
-        "unique_id": other_id,
-        "messages": [
-            {
-                "text": m.text,
-                "time": m.time,
-                "from_me": str(m.user) == current_user_id,
-                "user": m.user
-            } for m in msgs
-        ]
-    }
-    return jsonify(data)
+        if isinstance(current_user, Freelancer):
+            other_id = conv.client_id
+            other_user = db.session.get(Client, other_id)
+        else:
+            other_id = conv.freelancer_id
+            other_user = db.session.get(Freelancer, other_id)
+
+        name = f"{other_user.first_name or ''} {other_user.last_name or ''}".strip() if other_user else f"Conversation {conv_id}"
+        messages, has_more = load_messages(conv_id, current_user_id, limit=limit)
+
+        data = {
+            "id": conv_id,
+            "name": name,
+            "avatar": DEFAULT_AVATAR,
+            "unique_id": str(other_id),
+            "last_id": last_id,
+            "has_more": has_more,
+            "messages": messages
+        }
 
+    if before_id is None and before is None and data["messages"]:
+        mark_read(conv_id, current_user, data["messages"][-1]["id"])
+
+    response = jsonify(data)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@app.route("/chat/<int:conv_id>/read", methods=["POST"])
+@login_required
+def read_conversation(conv_id):
+    conv = db.session.get(Conversation, conv_id)
+    if conv is None or not conv.has_participant(current_user):
+        return jsonify({"error": "No messages found"}), 404
+    try:
+        last_id = int((request.get_json(silent=True) or {}).get("last_id") or 0)
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid last_id"}), 400
+    mark_read(conv_id, current_user, min(last_id, conv.last_message_id or 0))
+    return jsonify({"status": "ok"})
+
+
+stream_slots = threading.BoundedSemaphore(app.config['CHAT_MAX_STREAMS'])
+
+
+@app.route("/chat/<int:conv_id>/stream")
+@login_required
+def stream_conversation(conv_id):
+    conv = db.session.get(Conversation, conv_id)
+    if conv is None or not conv.has_participant(current_user):
+        return jsonify({"error": "No messages found"}), 404
 
+    if not stream_slots.acquire(blocking=False):
+        response = jsonify({"error": "too many open streams, poll instead"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+    released = []
+
+    def release_slot():
+        if not released:
+            released.append(True)
+            stream_slots.release()
+
+    current_user_id = str(current_user.id)
+    after_id = request.headers.get("Last-Event-ID", type=int) or request.args.get("after_id", 0, type=int)
+
+    lookback = datetime.utcnow() - timedelta(seconds=app.config['CHAT_STREAM_LOOKBACK'])
+    try:
+        sub = chat_hub.subscribe(conv_id)
+        missed = (
+            Message.query.filter(Message.conv_id == conv_id,
+                                 db.or_(Message.id > after_id, Message.created_at >= lookback))
+            .order_by(Message.id.asc())
+            .all()
+        )
+    except Exception:
+        release_slot()
+        raise
+    backlog = [{"id": m.id, "text": m.text, "time": display_time(m.created_at),
+                "created_at": utc_isoformat(m.created_at), "user": m.user} for m in missed]
+    db.session.remove()
+
+    timeout = app.config['CHAT_STREAM_TIMEOUT']
+    keepalive = app.config['CHAT_STREAM_KEEPALIVE']
+
+    def format_event(event):
+        event = dict(event, from_me=str(event["user"]) == current_user_id)
+        return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+    def events():
+        # Ids already sent on this connection; events can arrive out of id order, so no high-water mark.
+        sent = set()
+        try:
+            yield "retry: 2000\n\n"
+            for event in backlog:
+                sent.add(event["id"])
+                yield format_event(event)
+
+            deadline = time.monotonic() + timeout
+            while not sub.closed and time.monotonic() < deadline:
+                event = sub.get(timeout=min(keepalive, max(deadline - time.monotonic(), 0)))
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif event["id"] not in sent:
+                    sent.add(event["id"])
+                    yield format_event(event)
+        finally:
+            sub.close()
+            release_slot()
+
+    response = Response(events(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.call_on_close(sub.close)
+    response.call_on_close(release_slot)
+    return response
 
 
 @app.route("/send", methods=["POST"])
@@ -254,36 +633,141 @@ def send():
     if not text or not receiver_id:
         return jsonify({"error": "empty or missing receiver"}), 400
 
-    now = datetime.now().strftime("%I:%M %p").lstrip("0")
-    msg = Message(conv_id=conv_id, user=user, receiver_id=receiver_id, from_me=True, text=text, time=now)
-    db.session.add(msg)
-    db.session.commit()
+    conv = db.session.get(Conversation, conv_id)
+    if conv is None or not conv.has_participant(current_user):
+        return jsonify({"error": "conversation not found"}), 404
+
+    created_at = datetime.utcnow()
+    if message_writer is not None:
+        row = {"conv_id": conv_id, "user": user, "receiver_id": receiver_id, "from_me": True, "text": text,
+               "created_at": created_at, "sender_role": current_user.role}
+        # Release the pooled connection while waiting for the batch to commit.
+        db.session.close()
+        try:
+            msg_id = message_writer.submit(row, timeout=app.config['CHAT_GROUP_COMMIT_TIMEOUT'])
+        except WriterOverloaded as e:
+            return jsonify({"error": str(e)}), 503
+    else:
+        msg = Message(conv_id=conv_id, user=user, receiver_id=receiver_id, from_me=True, text=text, created_at=created_at)
+        db.session.add(msg)
+        touch_conversation(conv_id, msg, current_user.role)
+        db.session.commit()
+        msg_id = msg.id
+        chat_hub.publish(conv_id, {"id": msg_id, "text": text, "time": display_time(created_at),
+                                   "created_at": utc_isoformat(created_at), "user": str(user)})
+    now, stamp = display_time(created_at), utc_isoformat(created_at)
 
-    return jsonify({"status": "ok", "message": {"from_me": True, "text": text, "time": now}})
+    return jsonify({"status": "ok", "message": {"id": msg_id, "from_me": True, "text": text, "time": now,
+                                                "created_at": stamp, "user": user}})
 
 
 @app.route("/receive/<int:conv_id>")
 @login_required
 def receive(conv_id):
-    now = datetime.now().strftime("%I:%M %p").lstrip("0")
-    reply = Message(conv_id=conv_id, user="Server", from_me=False, text="Got your message!", time=now)
+    conv = db.session.get(Conversation, conv_id)
+    if conv is None or not conv.has_participant(current_user):
+        return jsonify({"error": "conversation not found"}), 404
+
+    reply = Message(conv_id=conv_id, user="Server", from_me=False, text="Got your message!", created_at=datetime.utcnow())
     db.session.add(reply)
+    # The canned reply comes from the other participant.
+    touch_conversation(conv_id, reply, "client" if isinstance(current_user, Freelancer) else "freelancer")
+    db.session.commit()
+    now, stamp = display_time(reply.created_at), utc_isoformat(reply.created_at)
+    chat_hub.publish(conv_id, {"id": reply.id, "text": reply.text, "time": now, "created_at": stamp, "user": reply.user})
+    return jsonify({"status": "ok", "message": {"id": reply.id, "from_me": False, "text": reply.text, "time": now,
+                                                "created_at": stamp, "user": reply.user}})
+
+
+def purge_messages(before, batch_size=5000):
+    """Delete messages created before `before` (naive UTC), batch by batch, and return how many."""
+    deleted = 0
+    while True:
+        # Short transactions keep /send from waiting behind one long delete.
+        ids = db.session.execute(
+            db.select(Message.id).where(Message.created_at < before).order_by(Message.created_at).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return deleted
+        db.session.execute(db.delete(Message).where(Message.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    stats = assets.build(app.config['ASSETS_AVATARS'], app.config['ASSETS_AVATAR_SIZE'])
+    click.echo(f"Fingerprinted {stats['files']} files ({stats['source_bytes'] / 1e6:.1f} MB): "
+               f"{stats['gzip']} gzip, {stats['br']} brotli, {stats['avatars']} resized avatars.")
+
+
+@app.cli.command("purge-messages")
+@click.option("--days", type=int, default=None, help="Keep this many days of history (CHAT_RETENTION_DAYS).")
+def purge_messages_command(days):
+    days = app.config['CHAT_RETENTION_DAYS'] if days is None else days
+    deleted = purge_messages(datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Deleted {deleted} messages older than {days} days.")
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    if not freelancer_search.fts_enabled():
+        raise click.ClickException("Full-text search is only available on SQLite.")
+    freelancer_search.rebuild_index()
     db.session.commit()
-    return jsonify({"status": "ok", "message": {"from_me": False, "text": reply.text, "time": now}})
+    count = db.session.execute(db.text(f"SELECT count(*) FROM {freelancer_search.FTS_TABLE}")).scalar()
+    click.echo(f"Indexed {count} freelancers for full-text search.")
+
+
+@app.cli.command("rebuild-profile-vectors")
+def rebuild_profile_vectors_command():
+    table = profile_index.rebuild(freelancer_profiles())
+    click.echo(f"Embedded {int((table['id'] > 0).sum())} freelancer profiles into {profile_index.path}.")
+
+
+app.config['ROLE_SERVING_MODE'] = os.environ.get('ROLE_SERVING_MODE', 'inline')
+app.config['ROLE_POOL_SIZE'] = int(os.environ.get('ROLE_POOL_SIZE', 2))
+app.config['ROLE_MAX_BATCH'] = int(os.environ.get('ROLE_MAX_BATCH', 32))
+app.config['ROLE_BATCH_WAIT_MS'] = float(os.environ.get('ROLE_BATCH_WAIT_MS', 5))
+app.config['ROLE_QUEUE_DEPTH'] = int(os.environ.get('ROLE_QUEUE_DEPTH', 256))
+app.config['ROLE_SERVING_SOCKET'] = os.environ.get('ROLE_SERVING_SOCKET', '/tmp/collabworks-roles.sock')
+app.config['ROLE_SERVING_TIMEOUT'] = float(os.environ.get('ROLE_SERVING_TIMEOUT', 5))
+
+app.config['ROLE_MODEL_WARMUP'] = os.environ.get('ROLE_MODEL_WARMUP', '0') == '1'
 
+role_service = RoleService.from_config(app.config)
+if app.config['ROLE_MODEL_WARMUP'] and app.config['ROLE_SERVING_MODE'] == 'inline':
+    role_model.warm_up()
+
+model_version = role_model.model_digest()
+
+app.config['PREDICT_BATCH_MAX'] = 1000
+app.config['ROLE_CACHE_SIZE'] = int(os.environ.get('ROLE_CACHE_SIZE', 4096))
+app.config['ROLE_CACHE_TTL'] = int(os.environ.get('ROLE_CACHE_TTL', 3600))
+
+role_cache = TTLCache(maxsize=app.config['ROLE_CACHE_SIZE'], ttl=app.config['ROLE_CACHE_TTL'])
+
+GENERIC_ROLES = {"Developer", "Engineer", "Designer"}
+
+
+def normalize_need_statement(text):
+    # Same tokens the TF-IDF vectorizer sees: lowercased runs of word characters.
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
 
-clf = joblib.load("role_predictor_new.pkl")
-mlb = joblib.load("mlb_new.pkl")
-thresholds = joblib.load("thresholds_new.pkl")
 
 def predict_roles_local(text, top_n=3):
-    probas = clf.predict_proba([text])[0]
-    preds = []
-    for i, p in enumerate(probas):
-        if p >= thresholds[i]:
-            preds.append((mlb.classes_[i], p))
-    preds.sort(key=lambda x: x[1], reverse=True)
-    return [role for role, _ in preds[:top_n]]
+    key = (model_version, normalize_need_statement(text), top_n)
+    roles = role_cache.get(key)
+    if roles is None:
+        with request_metrics.timer("role"):
+            roles = tuple(role_service.predict(text, top_n))
+        role_cache.set(key, roles)
+    return list(roles)
+
+
+def is_confident(roles):
+    return bool(roles) and not all(role in GENERIC_ROLES for role in roles)
+
 
 @app.route('/predict_roles', methods=['POST'])
 def predict_roles():
@@ -291,9 +775,13 @@ def predict_roles():
     top_n = int(request.form.get("top_n", 4))
 
     try:
-        predicted_roles = predict_roles_local(need_statement, top_n)
-        generic_roles = {"Developer", "Engineer", "Designer"}
-        if not predicted_roles or all(role in generic_roles for role in predicted_roles):
+        try:
+            predicted_roles = predict_roles_local(need_statement, top_n)
+        except ServingOverloaded:
+            return jsonify({
+                "error": "We're handling a lot of searches right now. Please try again in a moment."
+            }), 503
+        if not is_confident(predicted_roles):
             friendly_message = (
                 "Hmm, we couldn’t confidently match your request. "
                 "Try rephrasing it with more details like the task or domain."
@@ -304,23 +792,12 @@ def predict_roles():
                 "message": friendly_message
             })
 
-        roles_file = "roles.json"
-        roles_data = []
-        if os.path.exists(roles_file):
-            with open(roles_file, "r") as f:
-                try:
-                    roles_data = json.load(f)
-                except json.JSONDecodeError:
-                    roles_data = []
-
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "need_statement": need_statement,
-            "roles": predicted_roles
-        }
-        roles_data.append(entry)
-        with open(roles_file, "w") as f:
-            json.dump(roles_data, f, indent=2)
+        db.session.add(RolePrediction(
+            session_key=prediction_session_key(),
+            need_statement=need_statement,
+            roles=predicted_roles
+        ))
+        db.session.commit()
 
         return jsonify({
             "need_statement": need_statement,
@@ -334,59 +811,335 @@ def predict_roles():
 
 
 
+@app.route('/predict_roles/cache', methods=['GET'])
+def predict_roles_cache_stats():
+    return jsonify(dict(role_cache.stats(), model_version=model_version))
+
+
+@app.route('/get_freelancers/cache', methods=['GET'])
+def freelancer_card_cache_stats():
+    return jsonify(card_cache.stats())
+
+
+@app.route('/chat/writer', methods=['GET'])
+def chat_writer_stats():
+    if message_writer is None:
+        return jsonify({"mode": "per-request"})
+    return jsonify(dict(message_writer.stats(), mode="group-commit"))
+
+
+@app.errorhandler(HashingOverloaded)
+def password_hashing_overloaded(e):
+    return "Sign-in is busy right now. Please try again in a few seconds.", 503, {"Retry-After": "5"}
+
+
+@app.route('/auth/throttle', methods=['GET'])
+def auth_throttle_stats():
+    return jsonify({"hashing": password_hasher.stats(), "limiter": login_limiter.stats(),
+                    "availability": availability.stats()})
+
+
+@app.route('/predict_roles/serving', methods=['GET'])
+def predict_roles_serving_stats():
+    return jsonify(role_service.stats())
+
+
+@app.route('/predict_roles/batch', methods=['POST'])
+def predict_roles_batch_view():
+    data = request.get_json(silent=True) or {}
+    need_statements = data.get("need_statements")
+    top_n = int(data.get("top_n", 4))
+
+    if not isinstance(need_statements, list) or not all(isinstance(t, str) for t in need_statements):
+        return jsonify({"error": "need_statements must be a list of strings"}), 400
+    if len(need_statements) > app.config['PREDICT_BATCH_MAX']:
+        return jsonify({"error": f"at most {app.config['PREDICT_BATCH_MAX']} need statements per batch"}), 413
+
+    try:
+        predictions = role_service.predict_many(need_statements, top_n)
+    except ServingOverloaded:
+        return jsonify({
+            "error": "We're handling a lot of searches right now. Please try again in a moment."
+        }), 503
+    except Exception as e:
+        return jsonify({
+            "error": "Something went wrong while processing your request. Please try again."
+        }), 500
+
+    return jsonify({
+        "results": [
+            {
+                "need_statement": text,
+                "predicted_roles": roles if is_confident(roles) else []
+            } for text, roles in zip(need_statements, predictions)
+        ]
+    })
+
+
 @app.route("/get_roles", methods=["GET"])
 def get_roles():
-    roles_file = "roles.json"
-    if os.path.exists(roles_file):
-        with open(roles_file, "r") as f:
-            roles_data = json.load(f)
-        with open(roles_file, "w") as f:
-            json.dump([], f)
-        return jsonify(roles_data)
-    return jsonify({"error": "roles.json not found"}), 404
+    entries = (
+        RolePrediction.query
+        .filter(
+            RolePrediction.session_key == prediction_session_key(),
+            RolePrediction.id > session.get("roles_cursor", 0),
+        )
+        .order_by(RolePrediction.id.asc())
+        .all()
+    )
+    if entries:
+        session["roles_cursor"] = entries[-1].id
+
+    return jsonify([
+        {
+            "timestamp": e.created_at.isoformat(),
+            "need_statement": e.need_statement,
+            "roles": e.roles
+        } for e in entries
+    ])
+
+
+MALE_IMAGES = [
+    "img/search/male-1.webp",
+    "img/search/male-2.webp",
+    "img/search/male-3.webp",
+    "img/search/male-4.webp"
+]
+
+FEMALE_IMAGES = [
+    "img/search/female-1.webp",
+    "img/search/female-2.webp",
+    "img/search/female-3.webp",
+    "img/search/female-4.webp"
+]
+
+FREELANCER_SORTS = {
+    "relevance": (None, "desc"),
+    "rating": (Freelancer.rating, "desc"),
+    "rating_asc": (Freelancer.rating, "asc"),
+    "price": (Freelancer.price, "asc"),
+    "price_desc": (Freelancer.price, "desc"),
+    "newest": (Freelancer.id, "desc"),
+}
+
+app.config['FREELANCER_PAGE_SIZE'] = 24
+app.config['FREELANCER_MAX_PAGE_SIZE'] = 100
+app.config['FREELANCER_CARD_CACHE_SIZE'] = int(os.environ.get('FREELANCER_CARD_CACHE_SIZE', 20000))
+app.config['FREELANCER_CACHE_MAX_AGE'] = int(os.environ.get('FREELANCER_CACHE_MAX_AGE', 30))
+
+# Encoded cards keyed by (id, updated_at): a profile change bumps updated_at and
+# deleted freelancers are never looked up again, so entries never go stale.
+card_cache = TTLCache(maxsize=app.config['FREELANCER_CARD_CACHE_SIZE'], ttl=0)
+
+
+def freelancer_card(f):
+    rating = f.rating if f.rating is not None else default_rating(f.id)
+    price = f.price if f.price is not None else default_price(f.id)
+    roles = parse_roles(f.roles)
+    images = FEMALE_IMAGES if (f.gender or "").lower() == "female" else MALE_IMAGES
+    image = assets.url(images[f.id % len(images)], size=app.config['ASSETS_AVATAR_SIZE'])
+    return {
+        "unique_id": f.id,
+        "name": f"{f.first_name} {f.last_name}".strip(),
+        "username": f.username,
+        "role": roles[0] if roles else "Freelancer",
+        "roles": roles,
+        "tagline": f.tagline,
+        "location": f.location,
+        "image": image,
+        "rate": f"₹{price}/hr",
+        "price": price,
+        "rating": rating,
+        "ratingCount": 20 + f.id*5,
+        "ratingIcon": "/static/img/search/rating-icon.webp"
+    }
+
+
+def freelancer_card_json(f):
+    key = (f.id, f.updated_at)
+    encoded = card_cache.get(key)
+    if encoded is None:
+        encoded = json.dumps(freelancer_card(f), separators=(",", ":"))
+        card_cache.set(key, encoded)
+    return encoded
+
+
+def card_page_response(rows, cards, **fields):
+    # Assembled from cached card JSON instead of re-serialising every card.
+    body = '{"freelancers":[' + ",".join(cards) + "]"
+    body += "".join(f",{json.dumps(k)}:{json.dumps(v)}" for k, v in fields.items()) + "}"
+    response = Response(body, mimetype="application/json")
+    response.add_etag()
+    modified = [f.updated_at for f in rows if f.updated_at is not None]
+    if modified:
+        response.last_modified = max(modified)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['FREELANCER_CACHE_MAX_AGE']
+    return response.make_conditional(request)
+
+
+def encode_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode().rstrip("=")
+
 
+def decode_cursor(cursor):
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_after(column, direction, value, row_id):
+    if column is Freelancer.id:
+        return Freelancer.id < row_id if direction == "desc" else Freelancer.id > row_id
+    # NULLs sort last, ties are broken by ascending id.
+    if value is None:
+        return db.and_(column.is_(None), Freelancer.id > row_id)
+    beyond = column < value if direction == "desc" else column > value
+    return db.or_(beyond, db.and_(column == value, Freelancer.id > row_id), column.is_(None))
+
+
+def role_scores(roles):
+    # Inverted index lookup: one seek per role on the (role, freelancer_id) primary key.
+    # Roles are ranked best first, so earlier roles weigh more.
+    weight = db.case(
+        {role: len(roles) - rank for rank, role in enumerate(roles)},
+        value=FreelancerRole.role,
+        else_=0,
+    )
+    return (
+        db.select(FreelancerRole.freelancer_id, db.func.sum(weight).label("score"))
+        .where(FreelancerRole.role.in_(roles))
+        .group_by(FreelancerRole.freelancer_id)
+        .subquery()
+    )
+
+
+def search_freelancers(roles=(), location=None, min_price=None, max_price=None, min_rating=None,
+                       sort="rating", cursor=None, limit=None):
+    if sort not in FREELANCER_SORTS or (sort == "relevance" and not roles):
+        sort = "rating"
+    column, direction = FREELANCER_SORTS[sort]
+    if not limit or limit < 1:
+        limit = app.config['FREELANCER_PAGE_SIZE']
+    limit = min(limit, app.config['FREELANCER_MAX_PAGE_SIZE'])
+
+    query = Freelancer.query
+    scores = None
+    if sort == "relevance":
+        scores = role_scores(list(roles))
+        query = query.join(scores, scores.c.freelancer_id == Freelancer.id)
+    elif roles:
+        query = query.filter(Freelancer.id.in_(
+            db.select(FreelancerRole.freelancer_id).where(FreelancerRole.role.in_(list(roles)))
+        ))
+    if location:
+        # A range on the lowercased key uses ix_freelancer_location_key; ilike() compiles to lower(location).
+        key = location.lower()
+        query = query.filter(Freelancer.location_key >= key)
+        if key[-1] != chr(0x10FFFF):
+            query = query.filter(Freelancer.location_key < key[:-1] + chr(ord(key[-1]) + 1))
+    if min_price is not None:
+        query = query.filter(Freelancer.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Freelancer.price <= max_price)
+    if min_rating is not None:
+        query = query.filter(Freelancer.rating >= min_rating)
+
+    position = decode_cursor(cursor) if cursor else None
+
+    if scores is not None:
+        rating = db.func.coalesce(Freelancer.rating, 0.0)
+        if position is not None and isinstance(position[0], list):
+            (score, last_rating), row_id = position
+            query = query.filter(db.tuple_(scores.c.score, rating, -Freelancer.id) < (score, last_rating, -row_id))
+        query = query.add_columns(scores.c.score).order_by(scores.c.score.desc(), rating.desc(), Freelancer.id.asc())
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            last, score = rows[limit - 1]
+            next_cursor = encode_cursor([score, last.rating or 0.0], last.id)
+        return [f for f, _ in rows[:limit]], next_cursor
+
+    if position is not None and not isinstance(position[0], list):
+        query = query.filter(keyset_after(column, direction, *position))
+
+    if column is Freelancer.id:
+        query = query.order_by(Freelancer.id.desc() if direction == "desc" else Freelancer.id.asc())
+    else:
+        ordered = column.desc() if direction == "desc" else column.asc()
+        query = query.order_by(ordered.nulls_last(), Freelancer.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), last.id)
+    return rows, next_cursor
 
-import random
 
 @app.route("/get_freelancers", methods=["GET"])
 def get_freelancers():
-    male_images = [
-        "/static/img/search/male-1.webp",
-        "/static/img/search/male-2.webp",
-        "/static/img/search/male-3.webp",
-        "/static/img/search/male-4.webp"
-    ]
+    args = request.args
+    rows, next_cursor = search_freelancers(
+        roles=[r.strip() for r in args.getlist("role") if r.strip()],
+        location=args.get("location", "").strip() or None,
+        min_price=args.get("min_price", type=int),
+        max_price=args.get("max_price", type=int),
+        min_rating=args.get("min_rating", type=float),
+        sort=args.get("sort", "rating"),
+        cursor=args.get("cursor"),
+        limit=args.get("limit", type=int),
+    )
+    return card_page_response(rows, [freelancer_card_json(f) for f in rows], next_cursor=next_cursor)
 
-    female_images = [
-        "/static/img/search/female-1.webp",
-        "/static/img/search/female-2.webp",
-        "/static/img/search/female-3.webp",
-        "/static/img/search/female-4.webp"
-    ]
 
-    freelancers = Freelancer.query.all()
-    result = []
+@app.route("/search_freelancers", methods=["GET"])
+def search_freelancers_text():
+    q = request.args.get("q", "").strip()
+    limit = request.args.get("limit", type=int)
+    if not limit or limit < 1:
+        limit = app.config['FREELANCER_PAGE_SIZE']
+    limit = min(limit, app.config['FREELANCER_MAX_PAGE_SIZE'])
+    cursor = request.args.get("cursor")
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None and not isinstance(position[0], (int, float)):
+        position = None
 
-    for f in freelancers:
-        image = random.choice(
-            female_images if f.gender.lower() == "female" else male_images
-        )
+    hits = freelancer_search.search(q, limit=limit + 1, after=position)
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last_id, rank = hits[-1]
+        next_cursor = encode_cursor(rank, last_id)
+    by_id = {f.id: f for f in Freelancer.query.filter(Freelancer.id.in_([i for i, _ in hits]))} if hits else {}
+    rows = [by_id[i] for i, _ in hits if i in by_id]
+    return card_page_response(rows, [freelancer_card_json(f) for f in rows], next_cursor=next_cursor)
 
-        result.append({
-            "unique_id": f.id,
-            "name": f"{f.first_name} {f.last_name}".strip(),
-            "username": f.username,
-            "role": "Developer",
-            "tagline": f.tagline,
-            "location": f.location,
-            "image": image,
-            "rate": f"₹{(50 + f.id*10)}/hr",
-            "rating": round(3.5 + (f.id % 15)/10, 1),
-            "ratingCount": 20 + f.id*5,
-            "ratingIcon": "/static/img/search/rating-icon.webp"
-        })
 
-    return jsonify(result)
+
+def freelancer_profiles():
+    rows = db.session.execute(db.select(Freelancer.id, Freelancer.tagline, Freelancer.roles)).all()
+    return [(row.id, row.roles, row.tagline) for row in rows]
+
+
+@app.route("/match_freelancers", methods=["GET", "POST"])
+def match_freelancers():
+    need_statement = request.values.get("need_statement", "").strip()
+    k = request.values.get("k", type=int) or app.config['FREELANCER_PAGE_SIZE']
+    k = max(min(k, app.config['FREELANCER_MAX_PAGE_SIZE']), 1)
+    if not need_statement:
+        return jsonify({"freelancers": []})
+
+    profile_index.ensure(freelancer_profiles)
+    hits = profile_index.search(need_statement, k=k)
+    by_id = {f.id: f for f in Freelancer.query.filter(Freelancer.id.in_([i for i, _ in hits]))} if hits else {}
+    hits = [(by_id[i], score) for i, score in hits if i in by_id]
+    # Cached cards are JSON objects; splice the per-query similarity in before the closing brace.
+    cards = [freelancer_card_json(f)[:-1] + f',"similarity":{round(score, 4)}}}' for f, score in hits]
+    return card_page_response([f for f, _ in hits], cards)
 
 
 
@@ -397,19 +1150,60 @@ def check_client_status():
     return jsonify({"status": "unauthorized"})
 
 
+# Anonymous renders of pages whose only per-user content is the header's account menu,
+# keyed by (template, newest mtime of the template and its includes).
+fragment_cache = TTLCache(maxsize=64, ttl=0)
+
+
+def cached_page(template, *includes):
+    if current_user.is_authenticated:
+        # The header shows the signed-in username; never share those renders.
+        response = Response(render_template(template), mimetype="text/html")
+        response.cache_control.no_store = True
+        response.cache_control.private = True
+        response.vary.add("Cookie")
+        return response
+
+    modified = max(os.path.getmtime(os.path.join(app.root_path, app.template_folder, name))
+                   for name in (template,) + includes)
+    key = (template, modified)
+    entry = fragment_cache.get(key)
+    if entry is None:
+        body = render_template(template).encode("utf-8")
+        # The pages carry their CSS and JS inline, so they compress about 6:1.
+        entry = (body, gzip.compress(body, compresslevel=6), hashlib.md5(body).hexdigest())
+        fragment_cache.set(key, entry)
+    body, compressed, etag = entry
+
+    if "gzip" in request.accept_encodings:
+        response = Response(compressed, mimetype="text/html")
+        response.content_encoding = "gzip"
+        etag += "-gz"
+    else:
+        response = Response(body, mimetype="text/html")
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(modified, timezone.utc)
+    response.cache_control.no_cache = True
+    response.cache_control.public = True
+    # Signing in changes the body.
+    response.vary.add("Cookie")
+    return response.make_conditional(request)
+
+
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return cached_page('index.html', 'header/header.html', 'footer/footer.html')
 
 
 @app.route('/header')
 def header():
-    return render_template('header.html')
+    return cached_page('header/header.html')
 
 
 @app.route('/footer')
 def footer():
-    return render_template('footer.html')
+    return cached_page('footer/footer.html')
 
 
 @app.route('/terms-of-service')
@@ -422,27 +1216,20 @@ def privacy_policy():
     return render_template('privacy_policy.html')
 
 @app.route('/freelancer')
+@login_required
 def freelancer_dashboard():
-    email = current_user.email
-
-    conn = sqlite3.connect('instance/database.db')
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT first_name, last_name, email, tagline, location, roles 
-        FROM freelancer 
-        WHERE email = ?
-    """, (email,))
-    row = cursor.fetchone()
-    conn.close()
+    if isinstance(current_user, Freelancer):
+        row = current_user
+    else:
+        row = Freelancer.query.filter_by(email=current_user.email).first()
 
     if row:
         freelancer = {
-            "name": f"{row[0]} {row[1]}" if row[1] else row[0],
-            "email": row[2],
-            "tagline": row[3],
-            "location": row[4],
-            "roles": row[5]
+            "name": f"{row.first_name} {row.last_name}" if row.last_name else row.first_name,
+            "email": row.email,
+            "tagline": row.tagline,
+            "location": row.location,
+            "roles": row.roles
         }
     else:
         freelancer = None
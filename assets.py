@@ -0,0 +1,170 @@
+"""Static asset pipeline: fingerprinted copies, gzip/brotli variants and resized avatars.
+
+`flask --app app build-assets` writes them under static/dist/ with a manifest.
+The app rewrites url_for('static', ...) through the manifest and serves dist/
+files with immutable cache headers, picking a precompressed variant when the
+client accepts one. Without a manifest everything is served from static/ as before.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from io import BytesIO
+
+from flask import request, send_from_directory
+
+MANIFEST = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".json", ".svg", ".ico", ".txt", ".html"}
+# Brotli and Pillow are in requirements.txt; if either is missing, builds skip .br files or avatar resizing.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class Assets:
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.static_folder = None
+        self.static_url_path = "/static"
+        self.dist = None
+        self.max_age = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ASSETS_DIST", os.environ.get("ASSETS_DIST", "dist"))
+        app.config.setdefault("ASSETS_MAX_AGE", int(os.environ.get("ASSETS_MAX_AGE", 31536000)))
+        # Cards show avatars at 48 CSS px; 96 covers 2x screens.
+        app.config.setdefault("ASSETS_AVATARS", ("img/search/male-", "img/search/female-"))
+        app.config.setdefault("ASSETS_AVATAR_SIZE", int(os.environ.get("ASSETS_AVATAR_SIZE", 96)))
+        self.static_folder = app.static_folder
+        self.static_url_path = app.static_url_path
+        self.dist = app.config["ASSETS_DIST"]
+        self.max_age = app.config["ASSETS_MAX_AGE"]
+        self.load()
+
+        app.url_defaults(self.rewrite_static)
+        app.jinja_env.globals["asset_url"] = self.url
+        # More specific than /static/<path:filename>, so dist/ files are served here.
+        app.add_url_rule(f"{self.static_url_path}/{self.dist}/<path:filename>", "assets", self.serve)
+        app.extensions["assets"] = self
+
+    def load(self):
+        try:
+            with open(os.path.join(self.static_folder, self.dist, MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        return self.manifest
+
+    def rewrite_static(self, endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = self.manifest.get(values["filename"].lstrip("/"), values["filename"])
+
+    def url(self, filename, size=None):
+        filename = filename.lstrip("/")
+        name = self.manifest.get(f"{filename}@{size}") if size else None
+        return f"{self.static_url_path}/{name or self.manifest.get(filename, filename)}"
+
+    def serve(self, filename):
+        directory = os.path.join(self.static_folder, self.dist)
+        mimetype = mimetypes.guess_type(filename)[0]
+        compressible = os.path.splitext(filename)[1].lower() in COMPRESSIBLE
+        encoding = None
+        for name, suffix in ENCODINGS if compressible else ():
+            if name in request.accept_encodings and os.path.isfile(os.path.join(directory, filename + suffix)):
+                encoding = name
+                filename += suffix
+                break
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=self.max_age)
+        if encoding:
+            response.content_encoding = encoding
+        if compressible:
+            response.vary.add("Accept-Encoding")
+        # Fingerprinted names never change content.
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    def build(self, avatars, avatar_size):
+        """Rebuild static/dist/ and its manifest; returns counts of what was written."""
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+
+        dist_dir = os.path.join(self.static_folder, self.dist)
+        previous = set(self.load().values())
+        manifest, written = {}, set()
+        stats = {"files": 0, "source_bytes": 0, "gzip": 0, "br": 0, "avatars": 0}
+
+        def write(name, data):
+            path = os.path.join(dist_dir, name)
+            written.add(name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(path + ".tmp", path)
+
+        def fingerprinted(filename, data):
+            root, ext = os.path.splitext(filename)
+            return f"{self.dist}/{root}.{hashlib.md5(data).hexdigest()[:10]}{ext}"
+
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+            for file in files:
+                path = os.path.join(root, file)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    data = f.read()
+                name = fingerprinted(filename, data)
+                target = name[len(self.dist) + 1:]
+                write(target, data)
+                manifest[filename] = name
+                stats["files"] += 1
+                stats["source_bytes"] += len(data)
+
+                if os.path.splitext(file)[1].lower() in COMPRESSIBLE:
+                    gz = gzip.compress(data, compresslevel=9, mtime=0)
+                    if len(gz) < len(data) * 0.9:
+                        write(target + ".gz", gz)
+                        stats["gzip"] += 1
+                    if brotli is not None:
+                        br = brotli.compress(data, quality=11)
+                        if len(br) < len(data) * 0.9:
+                            write(target + ".br", br)
+                            stats["br"] += 1
+
+                if Image is not None and filename.startswith(avatars):
+                    with Image.open(BytesIO(data)) as image:
+                        image = image.convert("RGB")
+                        image.thumbnail((avatar_size, avatar_size))
+                        out = BytesIO()
+                        image.save(out, "WEBP", quality=80)
+                    resized = out.getvalue()
+                    root_name = os.path.splitext(filename)[0]
+                    name = fingerprinted(f"{root_name}-{avatar_size}.webp", resized)
+                    write(name[len(self.dist) + 1:], resized)
+                    manifest[f"{filename}@{avatar_size}"] = name
+                    stats["avatars"] += 1
+
+        written.add(MANIFEST)
+        os.makedirs(dist_dir, exist_ok=True)
+        with open(os.path.join(dist_dir, MANIFEST + ".tmp"), "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(os.path.join(dist_dir, MANIFEST + ".tmp"), os.path.join(dist_dir, MANIFEST))
+
+        # Keep the previous build's files so pages rendered before a restart still load.
+        keep = written | {name[len(self.dist) + 1:] for name in previous}
+        for root, dirs, files in os.walk(dist_dir):
+            for file in files:
+                name = os.path.relpath(os.path.join(root, file), dist_dir).replace(os.sep, "/")
+                base = name[:-3] if name.endswith((".gz", ".br")) else name
+                if base not in keep:
+                    os.remove(os.path.join(root, file))
+        self.manifest = manifest
+        return stats
@@ -0,0 +1,145 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+from flask import current_app
+
+from extensions import db
+from password_hashing import TokenBucketLimiter
+
+indexes = []
+limiter = None
+
+
+def init_app(app):
+    global limiter
+    app.config.setdefault("AVAILABILITY_REFRESH_SECONDS", float(os.environ.get("AVAILABILITY_REFRESH_SECONDS", 5)))
+    app.config.setdefault("AVAILABILITY_ERROR_RATE", float(os.environ.get("AVAILABILITY_ERROR_RATE", 0.001)))
+    app.config.setdefault("AVAILABILITY_CHECK_BURST", int(os.environ.get("AVAILABILITY_CHECK_BURST", 60)))
+    app.config.setdefault("AVAILABILITY_CHECK_PER_MINUTE", float(os.environ.get("AVAILABILITY_CHECK_PER_MINUTE", 120)))
+    limiter = TokenBucketLimiter(app.config["AVAILABILITY_CHECK_BURST"], app.config["AVAILABILITY_CHECK_PER_MINUTE"])
+
+
+def allow(ip):
+    return limiter is None or limiter.allow(ip)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for p in self.positions(value):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self.positions(value))
+
+
+class TakenIndex:
+    """Bloom filter over one unique column; only possible hits are confirmed in the database.
+
+    Each worker builds its filter on first use and picks up rows added by other
+    workers every AVAILABILITY_REFRESH_SECONDS by primary key, so for up to that
+    long a value registered through another worker can still be reported free.
+    That answer is only advisory: registration validates against the database and
+    relies on the unique constraint. Deleted values stay in the filter and are
+    answered by the database until the next rebuild.
+    """
+
+    def __init__(self, model, name):
+        self.column = getattr(model, name)
+        self.pk = db.inspect(model).primary_key[0]
+        self.filter = None
+        self.max_id = 0
+        self.synced = 0.0
+        self.removed = 0
+        self.lock = threading.Lock()
+        self.checks = 0
+        self.db_checks = 0
+        self.false_positives = 0
+        indexes.append(self)
+
+    def build(self):
+        rows = db.session.execute(db.select(self.pk, self.column).where(self.column.isnot(None))).all()
+        bloom = BloomFilter(max(len(rows) * 2, 1024), current_app.config["AVAILABILITY_ERROR_RATE"])
+        for _, value in rows:
+            bloom.add(value)
+        self.max_id = max((row_id for row_id, _ in rows), default=0)
+        self.removed = 0
+        self.filter = bloom
+
+    def sync(self):
+        now = time.monotonic()
+        bloom = self.filter
+        if bloom is not None and now - self.synced < current_app.config["AVAILABILITY_REFRESH_SECONDS"]:
+            return bloom
+        with self.lock:
+            if self.filter is None or self.filter.count > self.filter.capacity:
+                self.build()
+            elif now - self.synced >= current_app.config["AVAILABILITY_REFRESH_SECONDS"]:
+                rows = db.session.execute(
+                    db.select(self.pk, self.column).where(self.pk > self.max_id, self.column.isnot(None))
+                ).all()
+                for row_id, value in rows:
+                    self.filter.add(value)
+                    self.max_id = max(self.max_id, row_id)
+            self.synced = now
+            return self.filter
+
+    def contains(self, value):
+        if not value:
+            return False
+        bloom = self.sync()
+        self.checks += 1
+        if value not in bloom:
+            return False
+        self.db_checks += 1
+        taken = db.session.execute(db.select(self.pk).where(self.column == value).limit(1)).first() is not None
+        if not taken:
+            self.false_positives += 1
+        return taken
+
+    def add(self, value):
+        if value and self.filter is not None:
+            with self.lock:
+                self.filter.add(value)
+
+    def discard(self, value):
+        # Bloom filters cannot forget; rebuild once removals would noticeably raise the hit rate.
+        if value and self.filter is not None:
+            with self.lock:
+                self.removed += 1
+                if self.removed > max(self.filter.count // 10, 100):
+                    self.filter = None
+
+    def stats(self):
+        return {
+            "column": str(self.column),
+            "entries": self.filter.count if self.filter else 0,
+            "bytes": len(self.filter.bits) if self.filter else 0,
+            "checks": self.checks,
+            "db_checks": self.db_checks,
+            "false_positives": self.false_positives,
+        }
+
+
+def stats():
+    return {
+        "indexes": [index.stats() for index in indexes],
+        "rate_limited": limiter.limited if limiter else 0,
+    }
@@ -0,0 +1,60 @@
+"""Landing page weight before and after the asset build (runs `build-assets` into static/dist/).
+
+Counts the HTML, every /static/ file it references and the avatars of one page of 24
+freelancer cards, as a browser accepting gzip and brotli would download them.
+
+    python benchmarks/bench_assets.py
+"""
+import gzip
+import json
+import os
+import re
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+from app import MALE_IMAGES, FEMALE_IMAGES, app, assets, fragment_cache
+
+ACCEPT = {"Accept-Encoding": "gzip, br"}
+
+
+def page_weight(client, card_images):
+    page = client.get("/", headers=ACCEPT)
+    html = page.get_data()
+    text = gzip.decompress(html) if page.headers.get("Content-Encoding") == "gzip" else html
+    text = text.decode("utf-8")
+    # Some templates pass filename='/img/...'; count those files once under their real path.
+    urls = sorted({re.sub("/+", "/", url) for url in re.findall(r'/static/[^"\'\s)]+', text)}) + card_images
+    total, revalidations, missing = len(html), 0, 0
+    for url in urls:
+        response = client.get(url, headers=ACCEPT)
+        if response.status_code != 200:
+            missing += 1
+            continue
+        total += len(response.get_data())
+        if "immutable" not in response.headers.get("Cache-Control", ""):
+            revalidations += 1
+    return len(urls), total, revalidations, missing
+
+
+def main():
+    client = app.test_client()
+    cards = (MALE_IMAGES + FEMALE_IMAGES) * 3
+
+    assets.manifest = {}
+    fragment_cache.clear()
+    before = page_weight(client, [f"/static/{name}" for name in cards])
+
+    stats = assets.build(app.config['ASSETS_AVATARS'], app.config['ASSETS_AVATAR_SIZE'])
+    fragment_cache.clear()
+    size = app.config['ASSETS_AVATAR_SIZE']
+    after = page_weight(client, [assets.url(name, size=size) for name in cards])
+
+    print(f"build: {json.dumps(stats)}")
+    for label, (files, total, revalidations, missing) in (("before", before), ("after", after)):
+        print(f"{label:<7} files={files:<3} first load={total / 1024:8.0f} KiB  "
+              f"repeat load requests={revalidations:<3} (missing {missing})")
+    print(f"dist: {os.path.join(app.static_folder, app.config['ASSETS_DIST'])}")
+
+
+if __name__ == "__main__":
+    main()
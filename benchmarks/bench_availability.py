@@ -0,0 +1,69 @@
+"""Username availability checks while typing: ORM lookups vs the Bloom filter index.
+
+    python benchmarks/bench_availability.py --users 100000
+"""
+import argparse
+import random
+import time
+
+from common import count_queries, make_app
+
+import availability
+from client_routes import Client
+from extensions import db
+
+
+def seed(users):
+    rows = [{"id": i, "username": f"user{i}", "unique_id": f"c-{i}", "email": f"user{i}@example.com",
+             "password": "x"} for i in range(1, users + 1)]
+    for start in range(0, len(rows), 50000):
+        db.session.execute(db.insert(Client), rows[start:start + 50000])
+    db.session.commit()
+
+
+def keystrokes(users, count):
+    # Prefixes of names being typed: mostly free, one in ten an existing username.
+    rng = random.Random(7)
+    names = []
+    while len(names) < count:
+        word = f"user{rng.randint(1, users)}" if rng.random() < 0.1 else f"jdoe{rng.randint(0, 10 ** 6)}x"
+        names.extend(word[:n] for n in range(4, len(word) + 1))
+    return names[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=20000)
+    args = parser.parse_args()
+
+    bench_app = make_app()
+    availability.init_app(bench_app)
+    with bench_app.app_context():
+        db.create_all()
+        seed(args.users)
+        names = keystrokes(args.users, args.checks)
+
+        def orm(name):
+            return Client.query.filter_by(username=name).first() is not None
+
+        index = availability.TakenIndex(Client, "username")
+        start = time.perf_counter()
+        index.sync()
+        print(f"filter build         {(time.perf_counter() - start) * 1000:.0f}ms for {args.users} names, "
+              f"{len(index.filter.bits) / 1024:.0f} KiB")
+
+        results = {}
+        for label, check in (("filter_by().first()", orm), ("bloom filter", index.contains)):
+            with count_queries() as counter:
+                start = time.perf_counter()
+                results[label] = [check(name) for name in names]
+                seconds = time.perf_counter() - start
+            print(f"{label:<20} {seconds / len(names) * 1e6:7.1f}us/check  queries={counter.count:<6} "
+                  f"taken={sum(results[label])}")
+        assert results["filter_by().first()"] == results["bloom filter"]
+        print(f"false positives      {index.false_positives} of {index.checks - sum(results['bloom filter'])} free names")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Conversation list latency and query count for list_conversations().
+
+    python benchmarks/bench_chat_list.py --conversations 10000 --messages 1000000
+"""
+import argparse
+
+from common import count_queries, make_app, timed
+
+from app import Conversation, ConversationMember, Message, list_conversations
+from client_routes import Client
+from extensions import db
+from freelancer_routes import Freelancer
+
+
+def seed(conversations, messages, users):
+    db.session.execute(db.insert(Client), [
+        {"id": i, "username": f"client{i}", "unique_id": f"c-{i}", "email": f"c{i}@example.com",
+         "first_name": "Client", "last_name": str(i), "password": "x"}
+        for i in range(1, users + 1)
+    ])
+    db.session.execute(db.insert(Freelancer), [
+        {"id": i, "username": f"freelancer{i}", "email": f"f{i}@example.com",
+         "first_name": "Freelancer", "last_name": str(i), "password": "x"}
+        for i in range(1, users + 1)
+    ])
+
+    per_conv = max(messages // conversations, 1)
+    batch = []
+    convs = []
+    for conv_id in range(1, conversations + 1):
+        client_id = str((conv_id % users) + 1)
+        freelancer_id = str(((conv_id * 7 + conv_id // users) % users) + 1)
+        convs.append({"id": conv_id, "client_id": int(client_id), "freelancer_id": int(freelancer_id),
+                      "last_message_id": conv_id * per_conv})
+        for n in range(per_conv):
+            sender, receiver = (client_id, freelancer_id) if n % 2 == 0 else (freelancer_id, client_id)
+            batch.append({"conv_id": conv_id, "user": sender, "receiver_id": receiver,
+                          "from_me": True, "text": f"message {n}"})
+        if len(batch) >= 50000:
+            db.session.execute(db.insert(Message), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Message), batch)
+    db.session.execute(db.insert(Conversation), convs)
+    db.session.execute(db.insert(ConversationMember), [
+        {"conversation_id": c["id"], "role": role, "user_id": c[f"{role}_id"],
+         "last_message_id": c["last_message_id"], "last_read_message_id": c["last_message_id"] - (c["id"] % 3),
+         "unread_count": c["id"] % 3}
+        for c in convs for role in ("client", "freelancer")
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    bench_app = make_app(args.db)
+    with bench_app.app_context():
+        db.create_all()
+        if not db.session.query(Message.id).first():
+            seed(args.conversations, args.messages, args.users)
+
+        for label, user_id, model in (("client", 1, Freelancer), ("freelancer", 1, Client)):
+            with count_queries() as counter:
+                conversations = list_conversations(user_id, model)
+            seconds = timed(lambda: list_conversations(user_id, model))
+            print(f"{label:<10} conversations={len(conversations):<5} "
+                  f"queries={counter.count:<3} latency={seconds * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Landing page, header and footer: Jinja render vs the fragment cache vs a conditional 304.
+
+    python benchmarks/bench_fragments.py --requests 500
+"""
+import argparse
+import time
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+from flask import render_template
+
+from app import app, fragment_cache
+
+
+def per_request(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    for path, template in (("/", "index.html"), ("/header", "header/header.html"), ("/footer", "footer/footer.html")):
+        with app.test_request_context(path):
+            render_only = per_request(lambda: render_template(template), args.requests)
+
+        def uncached():
+            fragment_cache.clear()
+            client.get(path)
+
+        cached = lambda: client.get(path)  # noqa: E731
+        etag = client.get(path).headers["ETag"]
+        conditional = lambda: client.get(path, headers={"If-None-Match": etag})  # noqa: E731
+        print(f"{path:<8} jinja render {render_only:7.0f}us  request uncached {per_request(uncached, args.requests):7.0f}us  "
+              f"cached {per_request(cached, args.requests):7.0f}us  304 {per_request(conditional, args.requests):7.0f}us  "
+              f"body {len(client.get(path).data) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Card payload cost per page: per-request serialisation vs. cached card JSON, and 304 revalidation.
+
+    python benchmarks/bench_freelancer_cards.py --profiles 5000 --page 24
+"""
+import argparse
+
+from common import make_app, timed
+
+from flask import jsonify, request
+
+from app import card_cache, card_page_response, freelancer_card, freelancer_card_json
+from extensions import db
+from freelancer_routes import Freelancer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    bench_app = make_app()
+    with bench_app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Freelancer), [
+            {"id": i, "username": f"freelancer{i}", "email": f"f{i}@example.com", "first_name": "Freelancer",
+             "last_name": str(i), "password": "x", "tagline": "React dashboards and landing pages",
+             "roles": "Frontend Developer, UI/UX Designer", "location": "Pune", "rating": 4.5, "price": 500}
+            for i in range(1, args.profiles + 1)
+        ])
+        db.session.commit()
+        rows = Freelancer.query.order_by(Freelancer.rating.desc(), Freelancer.id).limit(args.page).all()
+
+        with bench_app.test_request_context("/get_freelancers"):
+            def serialise():
+                return jsonify({"freelancers": [freelancer_card(f) for f in rows], "next_cursor": None}).get_data()
+
+            def cold():
+                card_cache.clear()
+                return card_page_response(rows, [freelancer_card_json(f) for f in rows], next_cursor=None)
+
+            def warm():
+                return card_page_response(rows, [freelancer_card_json(f) for f in rows], next_cursor=None)
+
+            response = warm()
+            size, etag = len(response.get_data()), response.get_etag()[0]
+            results = [("per-request dicts", timed(serialise, args.repeat)), ("cache cold", timed(cold, args.repeat)),
+                       ("cache warm", timed(warm, args.repeat))]
+
+        with bench_app.test_request_context("/get_freelancers", headers={"If-None-Match": f'"{etag}"'}):
+            response = warm()
+            sent = b"".join(response.get_app_iter(request.environ))
+            results.append((f"revalidate ({response.status_code})", timed(warm, args.repeat)))
+
+        for label, seconds in results:
+            print(f"{label:<20} {seconds * 1e6:8.1f}us")
+        print(f"payload {size} bytes per page, {len(sent)} bytes on a {response.status_code}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Free-text freelancer search: FTS5 bm25 ranking vs. LIKE scans.
+
+    python benchmarks/bench_fts_search.py --profiles 100000
+"""
+import argparse
+import random
+
+from common import count_queries, make_app, timed
+
+import freelancer_search
+from extensions import db
+from freelancer_routes import Freelancer
+
+ROLES = ["React Developer", "Python Developer", "UI/UX Designer", "Data Analyst", "DevOps Engineer",
+         "Content Writer", "Android Developer", "Video Editor", "SEO Specialist", "Graphic Designer"]
+CITIES = ["Pune", "Mumbai", "Bengaluru", "Delhi", "Hyderabad", "Chennai", "Kolkata", "Jaipur"]
+WORDS = ["dashboards", "landing pages", "APIs", "mobile apps", "reports", "brand identity",
+         "pipelines", "e-commerce", "blogs", "automation"]
+QUERIES = ["react dashboard in Pune", "python api", "graphic designer mumbai", "devops pipelines",
+           "seo blogs", "shopify pune", "freelancer 4242"]
+
+
+def seed(profiles):
+    rng = random.Random(13)
+    batch = []
+    for i in range(1, profiles + 1):
+        roles = rng.sample(ROLES, 2)
+        batch.append({
+            "id": i, "username": f"freelancer{i}", "email": f"f{i}@example.com",
+            "first_name": "Freelancer", "last_name": str(i), "password": "x",
+            "tagline": f"{roles[0]} building {rng.choice(WORDS)} and {rng.choice(WORDS)}"
+                       + (" on Shopify" if i % 1000 == 0 else ""),
+            "roles": ", ".join(roles), "location": rng.choice(CITIES),
+            "rating": round(rng.uniform(3, 5), 1), "price": rng.randrange(100, 2000, 50),
+        })
+        if len(batch) >= 20000:
+            db.session.execute(db.insert(Freelancer), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Freelancer), batch)
+    freelancer_search.rebuild_index()
+    db.session.commit()
+
+
+def like_search(q, limit):
+    # What a server-side version of the old client-side filter would do, best rated first.
+    terms = freelancer_search.match_query(q).replace('"', "").replace("*", "").split()
+    text = db.func.lower(Freelancer.first_name + " " + Freelancer.last_name + " " + Freelancer.tagline + " "
+                         + Freelancer.roles + " " + Freelancer.location)
+    return (Freelancer.query.filter(*[text.like(f"%{t}%") for t in terms])
+            .order_by(Freelancer.rating.desc(), Freelancer.id).limit(limit).all())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=24)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    bench_app = make_app(args.db)
+    with bench_app.app_context():
+        db.create_all()
+        if not db.session.query(Freelancer.id).first():
+            seed(args.profiles)
+
+        for q in QUERIES:
+            with count_queries() as counter:
+                hits = freelancer_search.search(q, limit=args.limit)
+            fts = timed(lambda: freelancer_search.search(q, limit=args.limit))
+            page2 = timed(lambda: freelancer_search.search(q, limit=args.limit, after=hits[-1][::-1] if hits else None))
+            like = timed(lambda: like_search(q, args.limit))
+            print(f"{q:<28} hits={len(hits):<3} queries={counter.count} fts={fts * 1000:.2f}ms "
+                  f"next_page={page2 * 1000:.2f}ms like={like * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
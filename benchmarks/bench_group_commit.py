@@ -0,0 +1,93 @@
+"""/send write path: one commit per message vs. group commit, at 1, 8 and 64 concurrent senders.
+
+    python benchmarks/bench_group_commit.py --seconds 3
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+from flask import Flask
+
+import db_config
+from app import Conversation, ConversationMember, Message, touch_conversation, write_messages
+from extensions import db
+from message_writer import GroupCommitWriter
+
+
+def make_app():
+    bench_app = Flask("bench")
+    path = os.path.join(tempfile.mkdtemp(prefix="collabworks-bench-"), "bench.db")
+    bench_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    # The same engine setup as the app (WAL, synchronous=NORMAL), pool large enough for 64 senders.
+    bench_app.config["DB_POOL_SIZE"] = 64
+    db_config.init_app(bench_app, db)
+    with bench_app.app_context():
+        db.create_all()
+        db.session.add_all(Conversation(id=i, client_id=i, freelancer_id=i) for i in range(1, 65))
+        db.session.add_all(ConversationMember(conversation_id=i, role=role, user_id=i)
+                           for i in range(1, 65) for role in ("client", "freelancer"))
+        db.session.commit()
+    return bench_app
+
+
+def send_per_request(conv_id):
+    msg = Message(conv_id=conv_id, user="1", receiver_id="2", from_me=True, text="hello")
+    db.session.add(msg)
+    touch_conversation(conv_id, msg, "client")
+    db.session.commit()
+    msg_id = msg.id
+    db.session.remove()
+    return msg_id
+
+
+def run(bench_app, senders, seconds, send):
+    stop = time.perf_counter() + seconds
+    counts = [0] * senders
+    latencies = [[] for _ in range(senders)]
+
+    def sender(n):
+        with bench_app.app_context():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                send(n % 64 + 1)
+                latencies[n].append(time.perf_counter() - start)
+                counts[n] += 1
+
+    threads = [threading.Thread(target=sender, args=(n,)) for n in range(senders)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    samples = sorted(s for per in latencies for s in per) or [0.0]
+    return sum(counts) / seconds, samples[int(0.99 * (len(samples) - 1))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--wait-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    for senders in (1, 8, 64):
+        bench_app = make_app()
+        rate, p99 = run(bench_app, senders, args.seconds, send_per_request)
+        print(f"senders={senders:<3} per-request commit  messages/s={rate:<8.0f} p99={p99:.1f}ms")
+
+        bench_app = make_app()
+        writer = GroupCommitWriter(write_messages, app=bench_app, max_batch=args.max_batch,
+                                   max_wait=args.wait_ms / 1000)
+        rate, p99 = run(bench_app, senders, args.seconds, lambda conv_id: writer.submit(
+            {"conv_id": conv_id, "user": "1", "receiver_id": "2", "from_me": True, "text": "hello",
+             "sender_role": "client"}))
+        stats = writer.stats()
+        print(f"senders={senders:<3} group commit        messages/s={rate:<8.0f} p99={p99:.1f}ms "
+              f"mean_batch={stats['mean_batch_size']}")
+
+
+if __name__ == "__main__":
+    main()
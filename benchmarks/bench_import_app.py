@@ -0,0 +1,51 @@
+"""Worker boot cost: `import app` with lazy model loading vs. loading the models eagerly
+(what every worker did before loading was deferred).
+
+    python benchmarks/bench_import_app.py --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+if {eager}:
+    import role_model
+    role_model.load_models()
+seconds = time.perf_counter() - start
+heavy = [m for m in ("numpy", "scipy", "sklearn", "pandas", "joblib") if m in sys.modules]
+print(json.dumps({{"seconds": seconds, "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "heavy": heavy}}))
+"""
+
+
+def measure(eager, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD.format(eager=eager)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    samples.sort(key=lambda s: s["seconds"])
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, eager in (("eager models", True), ("lazy models", False)):
+        s = measure(eager, args.runs)
+        print(f"{label:<13} import={s['seconds'] * 1000:>7.0f}ms  peak_rss={s['rss_kb'] / 1024:>6.1f}MB  "
+              f"heavy_modules={','.join(s['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Queries per authenticated request spent in load_user().
+
+    python benchmarks/bench_load_user.py --requests 1000
+"""
+import argparse
+
+from common import count_queries, make_app, timed
+
+from app import load_user, user_cache
+from client_routes import Client
+from extensions import db
+from freelancer_routes import Freelancer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    bench_app = make_app()
+    with bench_app.app_context():
+        db.create_all()
+        db.session.add_all([Client(id=i, username=f"client{i}", email=f"c{i}@example.com", password="x")
+                            for i in range(1, 11)])
+        db.session.add_all([Freelancer(id=i, username=f"freelancer{i}", email=f"f{i}@example.com",
+                                       first_name="F", last_name=str(i), password="x") for i in (5, 12)])
+        db.session.commit()
+
+    cases = [
+        ("legacy '5' (signed out)", "5", True),
+        ("'freelancer:12', cache off", "freelancer:12", True),
+        ("'freelancer:5', cache off", "freelancer:5", True),
+        ("'freelancer:12', cache on", "freelancer:12", False),
+        ("'client:5', cache on", "client:5", False),
+    ]
+    for label, user_id, clear_cache in cases:
+        def request_cycle():
+            # One request: a fresh session, as Flask-SQLAlchemy gives each request.
+            with bench_app.test_request_context():
+                if clear_cache:
+                    user_cache.clear()
+                user = load_user(user_id)
+                db.session.remove()
+                return user
+
+        with bench_app.app_context():
+            request_cycle()
+            with count_queries() as counter:
+                for _ in range(args.requests):
+                    request_cycle()
+            seconds = timed(lambda: [request_cycle() for _ in range(100)]) / 100
+        with bench_app.test_request_context():
+            user = load_user(user_id)
+            resolved = f"{user.role}:{user.id}" if user else "None"
+        print(f"{label:<36} resolves={resolved:<14} queries/request={counter.count / args.requests:.2f} "
+              f"latency={seconds * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
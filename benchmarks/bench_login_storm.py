@@ -0,0 +1,112 @@
+"""Login throughput and latency under a login storm, with and without the hashing pool and limiter.
+
+Attempts arrive at --rate per second and are handled by --threads request threads, as in one
+gthread gunicorn worker. Most come from a few addresses hammering a few accounts; the rest are
+distinct users. A probe request (the rest of the site) arrives every 20 ms on the same threads.
+
+    python benchmarks/bench_login_storm.py --rate 40 --seconds 10 --rounds 12
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+from flask import Flask
+from flask_bcrypt import Bcrypt
+
+from password_hashing import HashingOverloaded, LoginLimiter, PasswordHasher
+
+
+def pct(samples, q):
+    samples = sorted(samples)
+    return samples[min(int(q * len(samples)), len(samples) - 1)] * 1000 if samples else 0.0
+
+
+def probe_request():
+    # Roughly one rendered freelancer page worth of Python work.
+    json.dumps([{"id": i, "name": f"Freelancer {i}", "roles": ["Web Developer"] * 3} for i in range(200)])
+
+
+def run(attempt, rate, seconds, threads, attacker_share):
+    executor = ThreadPoolExecutor(max_workers=threads)
+    outcomes = Counter()
+    users, probes = [], []
+
+    def login(arrived, ip, account, is_user):
+        outcome = attempt(ip, account)
+        outcomes[outcome] += 1
+        if is_user and outcome == "ok":
+            users.append(time.perf_counter() - arrived)
+
+    def probe(arrived):
+        probe_request()
+        probes.append(time.perf_counter() - arrived)
+
+    start = time.perf_counter()
+    sent = probes_sent = 0
+    while (now := time.perf_counter()) < start + seconds:
+        while sent < (now - start) * rate:
+            sent += 1
+            if sent * 37 % 100 < attacker_share:
+                executor.submit(login, now, f"10.0.0.{sent % 4}", f"victim{sent % 4}@example.com", False)
+            else:
+                executor.submit(login, now, f"192.168.0.{sent % 250}", f"user{sent}@example.com", True)
+        while probes_sent < (now - start) / 0.02:
+            probes_sent += 1
+            executor.submit(probe, now)
+        time.sleep(0.002)
+    # Whatever is still queued when the storm ends was never answered.
+    executor.shutdown(wait=True, cancel_futures=True)
+    unanswered = sent - sum(outcomes.values())
+    return users, probes, outcomes, unanswered, probes_sent - len(probes)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=40, help="login attempts per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--queue", type=int, default=8)
+    parser.add_argument("--attacker-share", type=int, default=90, help="percent of attempts from the storm")
+    args = parser.parse_args()
+
+    app = Flask("bench")
+    app.config.update(BCRYPT_LOG_ROUNDS=args.rounds, PASSWORD_HASH_WORKERS=args.workers,
+                      PASSWORD_HASH_QUEUE=args.queue)
+    bcrypt = Bcrypt(app)
+    hasher = PasswordHasher(bcrypt, app)
+    limiter = LoginLimiter(app)
+    pw_hash = bcrypt.generate_password_hash("correct horse").decode("utf-8")
+
+    def inline(ip, account):
+        bcrypt.check_password_hash(pw_hash, "wrong password")
+        return "ok"
+
+    def pooled(ip, account):
+        try:
+            hasher.check(pw_hash, "wrong password")
+        except HashingOverloaded:
+            return "overloaded"
+        return "ok"
+
+    def pooled_limited(ip, account):
+        if not limiter.allow(ip, account):
+            return "limited"
+        return pooled(ip, account)
+
+    for label, attempt in (("inline", inline), ("pool", pooled), ("pool + limiter", pooled_limited)):
+        users, probes, outcomes, unanswered, probes_dropped = run(
+            attempt, args.rate, args.seconds, args.threads, args.attacker_share)
+        print(f"{label:<15} hashes/s={outcomes['ok'] / args.seconds:<5.1f} "
+              f"user logins={len(users):<4} p50={pct(users, 0.5):<6.0f}ms p99={pct(users, 0.99):<6.0f}ms "
+              f"limited={outcomes['limited']:<4} overloaded={outcomes['overloaded']:<4} unanswered={unanswered:<4} "
+              f"probe p99={pct(probes, 0.99):.0f}ms (unanswered {probes_dropped})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time-based message queries: since-polling, jumping back in history and retention purges.
+
+    python benchmarks/bench_message_time.py --conversations 10000 --messages 1000000
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from common import make_app, timed
+
+from app import Message, purge_messages
+from extensions import db
+
+
+def seed(conversations, messages, days):
+    start = datetime.utcnow() - timedelta(days=days)
+    step = timedelta(days=days) / messages
+    batch = []
+    for n in range(messages):
+        batch.append({"conv_id": n % conversations + 1, "user": "1", "receiver_id": "2", "from_me": True,
+                      "text": f"message {n}", "created_at": start + step * n})
+        if len(batch) >= 50000:
+            db.session.execute(db.insert(Message), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Message), batch)
+    db.session.commit()
+
+
+def plan(query):
+    compiled = query.compile(db.engine, compile_kwargs={"literal_binds": True})
+    return " / ".join(row[3] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=400)
+    args = parser.parse_args()
+
+    bench_app = make_app()
+    with bench_app.app_context():
+        db.create_all()
+        seed(args.conversations, args.messages, args.days)
+        now = datetime.utcnow()
+
+        since = db.select(Message.id).where(Message.conv_id == 42, Message.created_at > now - timedelta(days=7)) \
+            .order_by(Message.created_at, Message.id).limit(200)
+        seconds = timed(lambda: db.session.execute(since).all())
+        print(f"since-poll (7 days)     latency={seconds * 1000:.2f}ms  plan: {plan(since)}")
+
+        before = db.select(Message.id).where(Message.conv_id == 42, Message.created_at < now - timedelta(days=200)) \
+            .order_by(Message.created_at.desc(), Message.id.desc()).limit(50)
+        seconds = timed(lambda: db.session.execute(before).all())
+        print(f"history before a date   latency={seconds * 1000:.2f}ms  plan: {plan(before)}")
+
+        cutoff = now - timedelta(days=365)
+        expected = db.session.execute(db.select(db.func.count()).where(Message.created_at < cutoff)).scalar()
+        seconds = timed(lambda: purge_messages(cutoff), repeat=1)
+        print(f"purge older than 365d   deleted={expected} in {seconds:.2f}s "
+              f"({expected / seconds:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Role prediction throughput: one predict_proba call per statement vs. one per batch.
+
+    python benchmarks/bench_predict_roles.py --statements 2000 --batch-size 500
+"""
+import argparse
+import random
+import time
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+from role_model import load_models, predict_roles_batch
+
+WORDS = (
+    "react dashboard developer plumber tutor math android app logo design marketing seo "
+    "wedding photographer electrician accountant tax data science python backend api "
+    "website ecommerce interior cleaning caregiver video editor"
+).split()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--statements", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--top-n", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15))) for _ in range(args.statements)]
+
+    load_models()
+
+    start = time.perf_counter()
+    single = [predict_roles_batch([t], args.top_n)[0] for t in texts]
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(texts), args.batch_size):
+        batched.extend(predict_roles_batch(texts[i:i + args.batch_size], args.top_n))
+    batch_seconds = time.perf_counter() - start
+
+    assert single == batched
+    print(f"per-statement  {len(texts) / single_seconds:>9.0f} statements/s")
+    print(f"batch={args.batch_size:<6}   {len(texts) / batch_seconds:>9.0f} statements/s "
+          f"({single_seconds / batch_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
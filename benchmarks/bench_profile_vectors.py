@@ -0,0 +1,70 @@
+"""Semantic freelancer matching over memory-mapped profile vectors.
+
+    python benchmarks/bench_profile_vectors.py --profiles 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the repo on sys.path)
+
+import role_model
+from profile_vectors import ProfileIndex
+
+WORDS = ["dashboards", "landing pages", "APIs", "mobile apps", "reports", "brand identity", "pipelines",
+         "e-commerce", "blogs", "automation", "wiring", "leak repairs", "wedding shoots", "tax filing"]
+QUERIES = ["I need an admin dashboard for my store", "my kitchen sink is leaking", "photos for my wedding",
+           "help me file my income tax", "design a logo for my startup"]
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(int(q * len(samples)), len(samples) - 1)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--k", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    _, mlb, _ = role_model.load_models()
+    rng = random.Random(14)
+    rows = [
+        (i, ", ".join(rng.sample(list(mlb.classes_), 2)), f"{rng.choice(WORDS)} and {rng.choice(WORDS)}")
+        for i in range(1, args.profiles + 1)
+    ]
+
+    index = ProfileIndex()
+    index.path = os.path.join(tempfile.mkdtemp(prefix="collabworks-bench-"), "profile_vectors.npy")
+    start = time.perf_counter()
+    index.rebuild(rows)
+    print(f"build      profiles={args.profiles} {time.perf_counter() - start:.2f}s "
+          f"file={os.path.getsize(index.path) / 1e6:.1f}MB")
+
+    # A fresh mapping, as a newly started worker would see it.
+    reader = ProfileIndex()
+    reader.path = index.path
+    for q in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits = reader.search(q, k=args.k)
+            samples.append(time.perf_counter() - start)
+        print(f"search     {q:<40} hits={len(hits):<3} p50={percentile(samples, 0.5):.2f}ms "
+              f"p99={percentile(samples, 0.99):.2f}ms top={rows[hits[0][0] - 1][1][:40] if hits else '-'}")
+
+    samples = []
+    for n in range(args.repeat):
+        start = time.perf_counter()
+        index.add(args.profiles + n + 1, "Frontend Developer", "React dashboards")
+        samples.append(time.perf_counter() - start)
+    print(f"add        p50={percentile(samples, 0.5):.2f}ms p99={percentile(samples, 0.99):.2f}ms "
+          f"visible_to_reader={int((reader.load()['id'] > args.profiles).sum())}/{args.repeat}")
+
+
+if __name__ == "__main__":
+    main()
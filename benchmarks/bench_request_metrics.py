@@ -0,0 +1,61 @@
+"""Per-request overhead of RequestMetrics, with and without cProfile on every request.
+
+    python benchmarks/bench_request_metrics.py --requests 2000 --queries 20
+"""
+import argparse
+import tempfile
+import time
+
+from common import make_app
+
+from extensions import db
+from request_metrics import RequestMetrics
+
+
+def build(queries, **config):
+    bench_app = make_app()
+    bench_app.config.update(config)
+
+    @bench_app.route("/page")
+    def page():
+        # An N+1 shaped handler: one statement per row.
+        for i in range(queries):
+            db.session.execute(db.text("SELECT :i"), {"i": i}).scalar()
+        return "x" * 2048
+
+    metrics = RequestMetrics(bench_app)
+    return bench_app, metrics
+
+
+def per_request(client, n):
+    client.get("/page")
+    start = time.perf_counter()
+    for _ in range(n):
+        client.get("/page")
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    for label, config in (
+        ("disabled", {"METRICS_ENABLED": False}),
+        ("enabled", {"METRICS_ENABLED": True, "METRICS_TOKEN": "bench"}),
+        ("enabled, profile all", {"METRICS_ENABLED": True, "METRICS_TOKEN": "bench", "METRICS_PROFILE_RATE": 1.0,
+                                  "METRICS_PROFILE_DIR": tempfile.mkdtemp(prefix="collabworks-profiles-")}),
+    ):
+        bench_app, metrics = build(args.queries, **config)
+        with bench_app.app_context():
+            results[label] = per_request(bench_app.test_client(), args.requests)
+        print(f"{label:<22} {results[label]:8.1f}us/request  (+{results[label] - results['disabled']:6.1f}us)")
+        if label == "enabled":
+            lines = "\n".join(metrics.queries.lines())
+            print("\n".join(line for line in lines.splitlines() if "_sum" in line or "_count" in line))
+
+
+if __name__ == "__main__":
+    main()
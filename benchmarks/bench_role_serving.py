@@ -0,0 +1,65 @@
+"""Concurrent /predict_roles-style load against each RoleService mode.
+
+    python benchmarks/bench_role_serving.py --threads 32 --requests 2000
+
+Socket mode needs a running sidecar: python role_serving.py --socket /tmp/collabworks-roles.sock
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+from role_model import load_models, predict_roles_batch
+from role_serving import LatencyStats, RoleService
+
+WORDS = (
+    "react dashboard developer plumber tutor math android app logo design marketing seo "
+    "wedding photographer electrician accountant tax data science python backend api "
+    "website ecommerce interior cleaning caregiver video editor"
+).split()
+
+
+def run(service, texts, threads, top_n):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda t: service.predict(t, top_n), texts))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--top-n", type=int, default=4)
+    parser.add_argument("--modes", default="inline,pool")
+    parser.add_argument("--socket", default="/tmp/collabworks-roles.sock")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15))) for _ in range(args.requests)]
+    load_models()
+    expected = predict_roles_batch(texts, args.top_n)
+
+    for mode in args.modes.split(","):
+        if mode == "socket" and not os.path.exists(args.socket):
+            print(f"{mode:<7} skipped (no sidecar at {args.socket})")
+            continue
+        service = RoleService(mode=mode, pool_size=args.pool_size, queue_depth=args.requests,
+                              socket_path=args.socket, timeout=30)
+        run(service, texts[:args.threads * 4], args.threads, args.top_n)  # warm up workers
+        service.latency = LatencyStats()
+        results, seconds = run(service, texts, args.threads, args.top_n)
+        assert results == expected, mode
+        stats = service.stats()
+        latency = stats["latency"]
+        batch = stats.get("batcher", {}).get("mean_batch_size", 1)
+        print(f"{mode:<7} {len(texts) / seconds:>8.0f} req/s  p50={latency['p50_ms']:.1f}ms "
+              f"p99={latency['p99_ms']:.1f}ms  mean_batch={batch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Concurrent send()-style writers and chat readers, one process each, against SQLite:
+default journaling vs. db_config (WAL, synchronous=NORMAL, busy_timeout).
+
+    python benchmarks/bench_sqlite_concurrency.py --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import multiprocessing
+import time
+
+import common  # noqa: F401  (puts the project root on sys.path)
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+import db_config
+from app import Conversation, Message
+from extensions import db
+
+
+def make_app(path, tuned):
+    bench_app = Flask("bench")
+    bench_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    if tuned:
+        db_config.init_app(bench_app, db)
+    else:
+        db.init_app(bench_app)
+    return bench_app
+
+
+def setup(path, tuned):
+    bench_app = make_app(path, tuned)
+    with bench_app.app_context():
+        db.create_all()
+        db.session.add(Conversation(id=1, client_id=1, freelancer_id=2))
+        db.session.commit()
+
+
+def worker(path, tuned, role, seconds, results):
+    # One process per worker, as gunicorn runs them; each has its own engine and pool.
+    bench_app = make_app(path, tuned)
+    done, locked, latencies = 0, 0, []
+    with bench_app.app_context():
+        stop = time.perf_counter() + seconds
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                if role == "write":
+                    message = Message(conv_id=1, user="1", receiver_id="2", from_me=True, text="hi")
+                    db.session.add(message)
+                    db.session.flush()
+                    db.session.execute(db.update(Conversation).where(Conversation.id == 1)
+                                       .values(last_message_id=message.id))
+                else:
+                    db.session.execute(db.select(Message).where(Message.conv_id == 1)
+                                       .order_by(Message.id.desc()).limit(50)).all()
+                db.session.commit()
+            except OperationalError:
+                db.session.rollback()
+                locked += 1
+                continue
+            done += 1
+            latencies.append(time.perf_counter() - start)
+    results.put((role, done, locked, latencies))
+
+
+def run(path, tuned, writers, readers, seconds):
+    setup(path, tuned)
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, tuned, role, seconds, results))
+             for role in ["write"] * writers + ["read"] * readers]
+    for p in procs:
+        p.start()
+    totals = {"write": [0, 0, []], "read": [0, 0, []]}
+    for _ in procs:
+        role, done, locked, latencies = results.get()
+        totals[role][0] += done
+        totals[role][1] += locked
+        totals[role][2].extend(latencies)
+    for p in procs:
+        p.join()
+
+    latencies = sorted(totals["write"][2]) or [0.0]
+    return (totals["write"][0] / seconds, totals["read"][0] / seconds, totals["write"][1] + totals["read"][1],
+            latencies[int(0.99 * (len(latencies) - 1))] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    for label, tuned in (("default journaling", False), ("db_config (WAL)", True)):
+        path = os.path.join(tempfile.mkdtemp(prefix="collabworks-bench-"), "bench.db")
+        writes, reads, locked, p99 = run(path, tuned, args.writers, args.readers, args.seconds)
+        print(f"{label:<20} writes/s={writes:<8.0f} reads/s={reads:<8.0f} locked_errors={locked:<5} "
+              f"write_p99={p99:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+class Subscription:
+    def __init__(self, hub, channel, maxsize=256):
+        self.hub = hub
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A stalled reader must not block the publisher; it will catch up
+            # from the database on reconnect.
+            self.close()
+
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.hub.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryBackend:
+    def start(self, dispatch):
+        self.dispatch = dispatch
+
+    def publish(self, channel, payload):
+        self.dispatch(channel, payload)
+
+
+class SQLiteBackend:
+    def __init__(self, path, poll_interval=0.05, retention=300):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.local = threading.local()
+
+        conn = self.connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_event ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "channel TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "created REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA busy_timeout=5000")
+            self.local.conn = conn
+        return conn
+
+    def start(self, dispatch):
+        self.dispatch = dispatch
+        row = self.connect().execute("SELECT MAX(id) FROM chat_event").fetchone()
+        self.last_id = row[0] or 0
+        thread = threading.Thread(target=self.run, name="chat-hub-sqlite", daemon=True)
+        thread.start()
+
+    def publish(self, channel, payload):
+        conn = self.connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT INTO chat_event (channel, payload, created) VALUES (?, ?, ?)",
+                (str(channel), json.dumps(payload), now),
+            )
+            conn.execute("DELETE FROM chat_event WHERE created < ?", (now - self.retention,))
+
+    def run(self):
+        conn = self.connect()
+        while True:
+            try:
+                rows = conn.execute(
+                    "SELECT id, channel, payload FROM chat_event WHERE id > ? ORDER BY id",
+                    (self.last_id,),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+            for event_id, channel, payload in rows:
+                self.last_id = event_id
+                self.dispatch(channel, json.loads(payload))
+            time.sleep(self.poll_interval)
+
+
+class ChatHub:
+    def __init__(self, app=None):
+        self.backend = None
+        self.subscribers = {}
+        self.lock = threading.Lock()
+        self.started = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("CHAT_HUB_BACKEND", os.environ.get("CHAT_HUB_BACKEND", "memory"))
+        app.config.setdefault(
+            "CHAT_HUB_SQLITE_PATH",
+            os.environ.get("CHAT_HUB_SQLITE_PATH", os.path.join(app.instance_path, "chat_events.db")),
+        )
+
+        kind = app.config["CHAT_HUB_BACKEND"]
+        if kind == "memory":
+            self.backend = MemoryBackend()
+        elif kind == "sqlite":
+            os.makedirs(os.path.dirname(app.config["CHAT_HUB_SQLITE_PATH"]) or ".", exist_ok=True)
+            self.backend = SQLiteBackend(app.config["CHAT_HUB_SQLITE_PATH"])
+        else:
+            raise ValueError(f"Unknown CHAT_HUB_BACKEND: {kind}")
+        app.extensions["chat_hub"] = self
+
+    def ensure_started(self):
+        # Backends start lazily so gunicorn workers begin their pollers after forking.
+        if not self.started:
+            with self.lock:
+                if not self.started:
+                    self.backend.start(self.dispatch)
+                    self.started = True
+
+    def subscribe(self, channel):
+        self.ensure_started()
+        sub = Subscription(self, str(channel))
+        with self.lock:
+            self.subscribers.setdefault(sub.channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            subs = self.subscribers.get(sub.channel)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self.subscribers[sub.channel]
+
+    def publish(self, channel, payload):
+        self.ensure_started()
+        self.backend.publish(str(channel), payload)
+
+    def dispatch(self, channel, payload):
+        with self.lock:
+            subs = list(self.subscribers.get(str(channel), ()))
+        for sub in subs:
+            sub.put(payload)
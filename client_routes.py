@@ -4,8 +4,10 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import InputRequired, Length, ValidationError
 from urllib.parse import urlparse, urljoin
+from sqlalchemy.exc import IntegrityError
 import uuid
-from extensions import db, bcrypt
+import availability
+from extensions import db, password_hasher, login_limiter, user_cache
 
 client_bp = Blueprint('client', __name__)
 
@@ -22,6 +24,13 @@ class Client(db.Model, UserMixin):
     def role(self):
         return "client"
 
+    def get_id(self):
+        # Client and Freelancer ids overlap, so the session key carries the table.
+        return f"{self.role}:{self.id}"
+
+taken_usernames = availability.TakenIndex(Client, 'username')
+taken_emails = availability.TakenIndex(Client, 'email')
+
 class ClientRegisterForm(FlaskForm):
     username = StringField(validators=[InputRequired(), Length(min=4, max=20)], render_kw={"placeholder": " "})
     email = StringField(validators=[Length(max=120)], render_kw={"placeholder": " "})
@@ -60,8 +69,11 @@ def client_login():
 
     form = ClientLoginForm()
     if form.validate_on_submit():
+        if not login_limiter.allow(request.remote_addr, form.email.data):
+            flash('Too many login attempts. Please wait a minute and try again.', 'danger')
+            return render_template('auth/client_login.html', form=form), 429, {"Retry-After": "60"}
         client = Client.query.filter_by(email=form.email.data).first()
-        if client and bcrypt.check_password_hash(client.password, form.password.data):
+        if password_hasher.verify(client, form.password.data):
             login_user(client)
             next_page = request.args.get('next')
             if next_page and is_safe_url(next_page):
@@ -89,8 +101,11 @@ def client_register():
         if existing_client:
             flash('This email is already registered. Try logging in instead.', 'danger')
             return render_template('auth/client_register.html', form=form)
+        if not login_limiter.allow(request.remote_addr):
+            flash('Too many attempts. Please wait a minute and try again.', 'danger')
+            return render_template('auth/client_register.html', form=form), 429, {"Retry-After": "60"}
 
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        hashed_password = password_hasher.generate(form.password.data)
         new_client = Client(
             username=form.username.data,
             email=form.email.data,
@@ -100,7 +115,15 @@ def client_register():
         )
 
         db.session.add(new_client)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Registered by a concurrent request after the form validated; the unique constraints decide.
+            db.session.rollback()
+            flash('That username or email is already registered. Please choose a different one.', 'danger')
+            return render_template('auth/client_register.html', form=form)
+        taken_usernames.add(new_client.username)
+        taken_emails.add(new_client.email)
         # flash('Client account created successfully! You can now log in.', 'success')
         if current_user.is_authenticated:
             next_page = request.args.get('next')
@@ -110,7 +133,7 @@ def client_register():
         form = ClientLoginForm()
         if form.validate_on_submit():
             client = Client.query.filter_by(email=form.email.data).first()
-            if client and bcrypt.check_password_hash(client.password, form.password.data):
+            if password_hasher.verify(client, form.password.data):
                 login_user(client)
                 next_page = request.args.get('next')
                 if next_page and is_safe_url(next_page):
@@ -125,8 +148,12 @@ def client_register():
 def client_delete_account():
     try:
         client_id = current_user.id
+        username, email = current_user.username, current_user.email
         Client.query.filter_by(id=client_id).delete()
         db.session.commit()
+        user_cache.pop(current_user.get_id())
+        taken_usernames.discard(username)
+        taken_emails.discard(email)
         logout_user()
         return jsonify({"message": "Account deleted successfully"}), 200
     except Exception as e:
@@ -134,14 +161,14 @@ def client_delete_account():
 
 @client_bp.route('/check_username', methods=['GET'])
 def check_client_username():
+    if not availability.allow(request.remote_addr):
+        return jsonify({'error': 'Too many requests'}), 429
     username = request.args.get('username')
-    existing_client = Client.query.filter_by(username=username).first()
-    return jsonify({'available': not bool(existing_client)})
+    return jsonify({'available': not taken_usernames.contains(username)})
 
 @client_bp.route('/check_email', methods=['GET'])
 def check_client_email():
+    if not availability.allow(request.remote_addr):
+        return jsonify({'error': 'Too many requests'}), 429
     email = request.args.get('email')
-    if email:
-        email_exists = Client.query.filter_by(email=email).first() is not None
-        return jsonify({'exists': email_exists})
-    return jsonify({'exists': False})
+    return jsonify({'exists': taken_emails.contains(email)})
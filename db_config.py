@@ -0,0 +1,69 @@
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def database_uri(default="sqlite:///database.db"):
+    uri = os.environ.get("DATABASE_URL", default)
+    # Heroku-style URLs; SQLAlchemy 1.4+ only accepts the postgresql:// scheme.
+    if uri.startswith("postgres://"):
+        uri = "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def engine_options(config):
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        # Python's sqlite3 timeout is the busy timeout used while the connection opens.
+        options["connect_args"] = {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}
+        if url.database in (None, "", ":memory:"):
+            return options
+    else:
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = config["DB_POOL_RECYCLE"]
+    options.update(
+        pool_size=config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+    )
+    return options
+
+
+def init_app(app, db):
+    """Configure the engine before db.init_app(app); pragmas are applied to every new connection."""
+    config = app.config
+    config.setdefault("SQLALCHEMY_DATABASE_URI", database_uri())
+    config.setdefault("SQLITE_JOURNAL_MODE", os.environ.get("SQLITE_JOURNAL_MODE", "WAL"))
+    config.setdefault("SQLITE_SYNCHRONOUS", os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"))
+    config.setdefault("SQLITE_BUSY_TIMEOUT_MS", int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)))
+    # Sized for the gthread worker: 32 threads can each hold a connection.
+    config.setdefault("DB_POOL_SIZE", int(os.environ.get("DB_POOL_SIZE", 10)))
+    config.setdefault("DB_MAX_OVERFLOW", int(os.environ.get("DB_MAX_OVERFLOW", 30)))
+    config.setdefault("DB_POOL_TIMEOUT", int(os.environ.get("DB_POOL_TIMEOUT", 30)))
+    config.setdefault("DB_POOL_RECYCLE", int(os.environ.get("DB_POOL_RECYCLE", 1800)))
+    config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(config))
+
+    db.init_app(app)
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", sqlite_pragmas(config))
+
+
+def sqlite_pragmas(config):
+    statements = [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+    ]
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    return on_connect
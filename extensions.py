@@ -1,5 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
+from flask_migrate import Migrate
+from assets import Assets
+from caching import TTLCache
+from chat_hub import ChatHub
+from password_hashing import LoginLimiter, PasswordHasher
+from profile_vectors import ProfileIndex
+from request_metrics import RequestMetrics
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
+migrate = Migrate()
+password_hasher = PasswordHasher(bcrypt)
+login_limiter = LoginLimiter()
+chat_hub = ChatHub()
+profile_index = ProfileIndex()
+assets = Assets()
+request_metrics = RequestMetrics()
+# Column values of logged-in users by their typed session id ("client:12").
+user_cache = TTLCache(maxsize=4096, ttl=60)
@@ -4,9 +4,14 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import InputRequired, Length, ValidationError
 from urllib.parse import urlparse, urljoin
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import validates
 from flask_login import UserMixin
 
-from extensions import db, bcrypt
+import availability
+from extensions import db, password_hasher, login_limiter, profile_index, user_cache
+import freelancer_search
 
 freelancer_bp = Blueprint('freelancer', __name__)
 
@@ -19,16 +24,60 @@ class Freelancer(UserMixin, db.Model):
     password = db.Column(db.String(200), nullable=False)
     tagline = db.Column(db.String(200))
     location = db.Column(db.String(100))
+    # Lowercased location for case-insensitive prefix filters served from an index range.
+    # Byte order ("C") on PostgreSQL so the range matches exactly what starts with the prefix.
+    location_key = db.Column(db.String(100).with_variant(db.String(100, collation="C"), "postgresql"), index=True)
     rating = db.Column(db.Float)
     price = db.Column(db.Integer)
     gender = db.Column(db.String(10))
     roles = db.Column(db.String(500))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_freelancer_rating_id', 'rating', 'id'),
+        db.Index('ix_freelancer_price_id', 'price', 'id'),
+    )
+
+    @validates('location')
+    def set_location_key(self, key, location):
+        self.location_key = location.lower() if location else None
+        return location
 
     @property
     def role(self):
         return "freelancer"
 
+    def get_id(self):
+        return f"{self.role}:{self.id}"
+
+class FreelancerRole(db.Model):
+    role = db.Column(db.String(100), primary_key=True)
+    freelancer_id = db.Column(db.Integer, primary_key=True, index=True)
+
+
+freelancer_search.register(Freelancer.__table__)
+
+
+def parse_roles(roles):
+    parsed = []
+    for role in (roles or "").split(","):
+        role = " ".join(role.split())
+        if role and role not in parsed:
+            parsed.append(role)
+    return parsed
+
+
+def default_rating(freelancer_id):
+    return round(3.5 + (freelancer_id % 15) / 10, 1)
+
+
+def default_price(freelancer_id):
+    return 50 + freelancer_id * 10
+
+
+taken_usernames = availability.TakenIndex(Freelancer, 'username')
+taken_emails = availability.TakenIndex(Freelancer, 'email')
+
 class FreelancerRegisterForm(FlaskForm):
     username = StringField(validators=[InputRequired(), Length(min=4, max=20)], render_kw={"placeholder": " "})
     email = StringField(validators=[Length(max=120)], render_kw={"placeholder": " "})
@@ -67,8 +116,11 @@ def freelancer_login():
 
     form = FreelancerLoginForm()
     if form.validate_on_submit():
+        if not login_limiter.allow(request.remote_addr, form.email.data):
+            flash('Too many login attempts. Please wait a minute and try again.', 'danger')
+            return render_template('auth/freelancer_login.html', form=form), 429, {"Retry-After": "60"}
         freelancer = Freelancer.query.filter_by(email=form.email.data).first()
-        if freelancer and bcrypt.check_password_hash(freelancer.password, form.password.data):
+        if password_hasher.verify(freelancer, form.password.data):
             login_user(freelancer)
             next_page = request.args.get('next')
             if next_page and is_safe_url(next_page):
@@ -96,14 +148,17 @@ def freelancer_register():
         if existing_freelancer:
             flash('This email is already registered. Try logging in instead.', 'danger')
             return render_template('auth/freelancer_register.html', form=form)
+        if not login_limiter.allow(request.remote_addr):
+            flash('Too many attempts. Please wait a minute and try again.', 'danger')
+            return render_template('auth/freelancer_register.html', form=form), 429, {"Retry-After": "60"}
 
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        hashed_password = password_hasher.generate(form.password.data)
         roles = request.form.get('roles')
         gender = request.form.get("gender")
         tagline = request.form.get("tagline")
         location = request.form.get("location")
-        rating = request.form.get("rating")
-        price = request.form.get("price")
+        rating = request.form.get("rating", type=float)
+        price = request.form.get("price", type=int)
 
         new_freelancer = Freelancer(
             username=form.username.data,
@@ -121,7 +176,25 @@ def freelancer_register():
 
 
         db.session.add(new_freelancer)
-        db.session.commit()
+        try:
+            db.session.flush()
+            if new_freelancer.rating is None:
+                new_freelancer.rating = default_rating(new_freelancer.id)
+            if new_freelancer.price is None:
+                new_freelancer.price = default_price(new_freelancer.id)
+            db.session.add_all(
+                FreelancerRole(role=role, freelancer_id=new_freelancer.id) for role in parse_roles(roles)
+            )
+            freelancer_search.index_freelancer(new_freelancer)
+            db.session.commit()
+        except IntegrityError:
+            # Registered by a concurrent request after the form validated; the unique constraints decide.
+            db.session.rollback()
+            flash('That username or email is already registered. Please choose a different one.', 'danger')
+            return render_template('auth/freelancer_register.html', form=form)
+        profile_index.add(new_freelancer.id, roles, tagline)
+        taken_usernames.add(new_freelancer.username)
+        taken_emails.add(new_freelancer.email)
         # flash('Freelancer account created successfully! You can now log in.', 'success')
         if current_user.is_authenticated:
             next_page = request.args.get('next')
@@ -132,7 +205,7 @@ def freelancer_register():
         form = FreelancerLoginForm()
         if form.validate_on_submit():
             freelancer = Freelancer.query.filter_by(email=form.email.data).first()
-            if freelancer and bcrypt.check_password_hash(freelancer.password, form.password.data):
+            if password_hasher.verify(freelancer, form.password.data):
                 login_user(freelancer)
                 next_page = request.args.get('next')
                 if next_page and is_safe_url(next_page):
@@ -149,8 +222,15 @@ def freelancer_register():
 def freelancer_delete_account():
     try:
         freelancer_id = current_user.id
+        username, email = current_user.username, current_user.email
         Freelancer.query.filter_by(id=freelancer_id).delete()
+        FreelancerRole.query.filter_by(freelancer_id=freelancer_id).delete()
+        freelancer_search.remove_freelancer(freelancer_id)
         db.session.commit()
+        profile_index.remove(freelancer_id)
+        user_cache.pop(current_user.get_id())
+        taken_usernames.discard(username)
+        taken_emails.discard(email)
         logout_user()
         return jsonify({"message": "Account deleted successfully"}), 200
     except Exception as e:
@@ -158,14 +238,14 @@ def freelancer_delete_account():
 
 @freelancer_bp.route('/check_username', methods=['GET'])
 def check_freelancer_username():
+    if not availability.allow(request.remote_addr):
+        return jsonify({'error': 'Too many requests'}), 429
     username = request.args.get('username')
-    existing_freelancer = Freelancer.query.filter_by(username=username).first()
-    return jsonify({'available': not bool(existing_freelancer)})
+    return jsonify({'available': not taken_usernames.contains(username)})
 
 @freelancer_bp.route('/check_email', methods=['GET'])
 def check_freelancer_email():
+    if not availability.allow(request.remote_addr):
+        return jsonify({'error': 'Too many requests'}), 429
     email = request.args.get('email')
-    if email:
-        email_exists = Freelancer.query.filter_by(email=email).first() is not None
-        return jsonify({'exists': email_exists})
-    return jsonify({'exists': False})
+    return jsonify({'exists': taken_emails.contains(email)})
@@ -0,0 +1,91 @@
+import re
+
+from sqlalchemy import DDL, event, text
+
+from extensions import db
+
+FTS_TABLE = "freelancer_fts"
+
+# bm25 column weights: name, tagline, roles, location
+FTS_WEIGHTS = (2.0, 1.0, 3.0, 1.5)
+
+STOPWORDS = {
+    "a", "an", "and", "at", "for", "from", "i", "in", "into", "is", "looking", "me", "my", "need",
+    "of", "on", "or", "someone", "the", "to", "want", "we", "who", "with",
+}
+
+CREATE_FTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, tagline, roles, location, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+
+def register(freelancer_table):
+    # db.create_all() does not know about virtual tables, so create the index with the table.
+    event.listen(freelancer_table, "after_create", DDL(CREATE_FTS).execute_if(dialect="sqlite"))
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Keep autogenerate from trying to drop the FTS5 table and its shadow tables.
+    return not (type_ == "table" and name.startswith(FTS_TABLE))
+
+
+def fts_enabled():
+    return db.engine.dialect.name == "sqlite"
+
+
+def index_freelancer(freelancer):
+    if not fts_enabled():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": freelancer.id})
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, name, tagline, roles, location) "
+             "VALUES (:id, :name, :tagline, :roles, :location)"),
+        {
+            "id": freelancer.id,
+            "name": f"{freelancer.first_name or ''} {freelancer.last_name or ''} {freelancer.username or ''}",
+            "tagline": freelancer.tagline or "",
+            "roles": freelancer.roles or "",
+            "location": freelancer.location or "",
+        },
+    )
+
+
+def remove_freelancer(freelancer_id):
+    if fts_enabled():
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": freelancer_id})
+
+
+def rebuild_index():
+    db.session.execute(text(CREATE_FTS))
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, tagline, roles, location) "
+        "SELECT id, COALESCE(first_name, '') || ' ' || COALESCE(last_name, '') || ' ' || COALESCE(username, ''), "
+        "COALESCE(tagline, ''), COALESCE(roles, ''), COALESCE(location, '') FROM freelancer"
+    ))
+
+
+def match_query(q):
+    terms = [t for t in re.findall(r"\w+", (q or "").lower()) if t not in STOPWORDS]
+    # Quote every term so user input can never be parsed as FTS5 syntax. Terms are
+    # ANDed ("react dashboard pune" must match all three), each as a prefix.
+    return " ".join(f'"{t}"*' for t in dict.fromkeys(terms))
+
+
+def search(q, limit=24, after=None):
+    """Return [(freelancer_id, rank)] best match first, continuing after an optional (rank, id)."""
+    match = match_query(q)
+    if not match or not fts_enabled():
+        return []
+
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    rank = f"bm25({FTS_TABLE}, {weights})"
+    sql = f"SELECT rowid, {rank} AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    params = {"match": match, "limit": limit}
+    if after is not None:
+        sql += f" AND ({rank} > :rank OR ({rank} = :rank AND rowid > :id))"
+        params.update(rank=after[0], id=after[1])
+    sql += " ORDER BY rank, rowid LIMIT :limit"
+    return [(row[0], row[1]) for row in db.session.execute(text(sql), params)]
@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from role_serving import LatencyStats
+
+
+class WriterOverloaded(Exception):
+    pass
+
+
+class GroupCommitWriter:
+    """Queues rows from concurrent requests and writes them in one transaction per batch.
+
+    write_batch(rows) must commit and return one result per row; submit() returns
+    only after the batch holding its row has committed. on_commit(rows, results), if
+    given, runs on the writer thread after each commit, in commit order.
+    """
+
+    def __init__(self, write_batch, app=None, max_batch=64, max_wait=0.002, max_queue=1024, on_commit=None):
+        self.write_batch = write_batch
+        self.on_commit = on_commit
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.latency = LatencyStats()
+        self.batch_sizes = deque(maxlen=2048)
+        self.batches = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.started = False
+
+    def ensure_started(self):
+        # Started on first use so gunicorn workers get their own thread after forking.
+        if not self.started:
+            with self.lock:
+                if not self.started:
+                    threading.Thread(target=self.run, name="message-writer", daemon=True).start()
+                    self.started = True
+
+    def submit(self, row, timeout=None):
+        self.ensure_started()
+        future = Future()
+        try:
+            self.queue.put_nowait((row, future, time.perf_counter()))
+        except queue.Full:
+            self.rejected += 1
+            raise WriterOverloaded("message write queue is full")
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            if not future.cancel():
+                # The writer already took the row, so it will be committed; a 503 now would
+                # make the client retry and store it twice.
+                return future.result()
+            self.timeouts += 1
+            raise WriterOverloaded("message write timed out")
+
+    def run(self):
+        if self.app is not None:
+            # write_batch runs on this thread, so give it the app's database.
+            self.app.app_context().push()
+        while True:
+            items = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    items.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Rows whose request gave up waiting are dropped, never written.
+            items = [item for item in items if item[1].set_running_or_notify_cancel()]
+            if items:
+                self.flush(items)
+
+    def flush(self, items):
+        try:
+            results = self.write_batch([item[0] for item in items])
+        except Exception as e:
+            if len(items) > 1:
+                # Retry one by one so a single bad row does not fail its neighbours.
+                for item in items:
+                    self.flush([item])
+                return
+            self.errors += 1
+            items[0][1].set_exception(e)
+        else:
+            if self.on_commit is not None:
+                try:
+                    self.on_commit([item[0] for item in items], results)
+                except Exception:
+                    # The rows are committed; a failed notification must not fail the requests.
+                    self.errors += 1
+            done = time.perf_counter()
+            for (row, future, start), result in zip(items, results):
+                future.set_result(result)
+                self.latency.observe(done - start)
+        self.batches += 1
+        self.batch_sizes.append(len(items))
+
+    def stats(self):
+        sizes = list(self.batch_sizes)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_limit": self.queue.maxsize,
+            "batches": self.batches,
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "max_batch_size": max(sizes) if sizes else 0,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "latency": self.latency.summary(),
+        }
@@ -0,0 +1,86 @@
+"""conversation table and message indexes
+
+Revision ID: 0002_conversation
+Revises: 0001_initial
+Create Date: 2026-10-17 19:52:10.418203
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_conversation'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('freelancer_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('client_id', 'freelancer_id', name='uq_conversation_client_freelancer')
+    )
+    op.create_index('ix_conversation_client_updated', 'conversation', ['client_id', 'updated_at'], unique=False)
+    op.create_index('ix_conversation_freelancer_updated', 'conversation', ['freelancer_id', 'updated_at'], unique=False)
+    op.create_index('ix_message_conv_id_id', 'message', ['conv_id', 'id'], unique=False)
+    op.create_index(op.f('ix_message_user'), 'message', ['user'], unique=False)
+    op.create_index(op.f('ix_message_receiver_id'), 'message', ['receiver_id'], unique=False)
+
+    # Backfill: the first message of each thread is the client -> freelancer
+    # opener written by start_chat. Threads that were opened twice for the
+    # same pair are merged into the lowest conv_id.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT m.conv_id, m.user, m.receiver_id, b.last_id "
+        "FROM message m JOIN ("
+        "  SELECT conv_id, MIN(id) AS first_id, MAX(id) AS last_id "
+        "  FROM message WHERE conv_id IS NOT NULL GROUP BY conv_id"
+        ") b ON m.id = b.first_id "
+        "ORDER BY m.conv_id"
+    )).fetchall()
+
+    now = datetime.utcnow()
+    canonical = {}
+    for conv_id, client_id, freelancer_id, last_id in rows:
+        if not str(client_id).isdigit() or not str(freelancer_id).isdigit():
+            continue
+        pair = (int(client_id), int(freelancer_id))
+        if pair in canonical:
+            target, target_last = canonical[pair]
+            bind.execute(
+                sa.text("UPDATE message SET conv_id = :target WHERE conv_id = :conv_id"),
+                {"target": target, "conv_id": conv_id},
+            )
+            canonical[pair] = (target, max(target_last, last_id))
+        else:
+            canonical[pair] = (conv_id, last_id)
+
+    if canonical:
+        bind.execute(
+            sa.text(
+                "INSERT INTO conversation (id, client_id, freelancer_id, last_message_id, updated_at) "
+                "VALUES (:id, :client_id, :freelancer_id, :last_message_id, :updated_at)"
+            ),
+            [
+                {"id": conv_id, "client_id": client_id, "freelancer_id": freelancer_id,
+                 "last_message_id": last_id, "updated_at": now}
+                for (client_id, freelancer_id), (conv_id, last_id) in canonical.items()
+            ],
+        )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_message_receiver_id'), table_name='message')
+    op.drop_index(op.f('ix_message_user'), table_name='message')
+    op.drop_index('ix_message_conv_id_id', table_name='message')
+    op.drop_index('ix_conversation_freelancer_updated', table_name='conversation')
+    op.drop_index('ix_conversation_client_updated', table_name='conversation')
+    op.drop_table('conversation')
@@ -0,0 +1,33 @@
+"""role prediction history table
+
+Revision ID: 0003_role_prediction
+Revises: 0002_conversation
+Create Date: 2026-10-17 20:04:37.192741
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_role_prediction'
+down_revision = '0002_conversation'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('role_prediction',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_key', sa.String(length=32), nullable=False),
+    sa.Column('need_statement', sa.String(length=1000), nullable=True),
+    sa.Column('roles', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_role_prediction_session_id', 'role_prediction', ['session_key', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_role_prediction_session_id', table_name='role_prediction')
+    op.drop_table('role_prediction')
@@ -0,0 +1,33 @@
+"""freelancer search indexes and rating/price backfill
+
+Revision ID: 0004_freelancer_search
+Revises: 0003_role_prediction
+Create Date: 2026-10-17 20:31:52.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_freelancer_search'
+down_revision = '0003_role_prediction'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_freelancer_location'), 'freelancer', ['location'], unique=False)
+    op.create_index('ix_freelancer_rating_id', 'freelancer', ['rating', 'id'], unique=False)
+    op.create_index('ix_freelancer_price_id', 'freelancer', ['price', 'id'], unique=False)
+
+    # Registration never collected rating/price, so cards showed values derived
+    # from the id. Store those so filters and sorting match what users see.
+    op.execute(sa.text("UPDATE freelancer SET rating = ROUND(3.5 + (id % 15) / 10.0, 1) WHERE rating IS NULL"))
+    op.execute(sa.text("UPDATE freelancer SET price = 50 + id * 10 WHERE price IS NULL"))
+
+
+def downgrade():
+    op.drop_index('ix_freelancer_price_id', table_name='freelancer')
+    op.drop_index('ix_freelancer_rating_id', table_name='freelancer')
+    op.drop_index(op.f('ix_freelancer_location'), table_name='freelancer')
@@ -0,0 +1,45 @@
+"""freelancer role association
+
+Revision ID: 0005_freelancer_role
+Revises: 0004_freelancer_search
+Create Date: 2026-10-17 20:58:14.339120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_freelancer_role'
+down_revision = '0004_freelancer_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('freelancer_role',
+    sa.Column('role', sa.String(length=100), nullable=False),
+    sa.Column('freelancer_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('role', 'freelancer_id')
+    )
+    op.create_index(op.f('ix_freelancer_role_freelancer_id'), 'freelancer_role', ['freelancer_id'], unique=False)
+
+    bind = op.get_bind()
+    rows = []
+    for freelancer_id, roles in bind.execute(sa.text("SELECT id, roles FROM freelancer WHERE roles IS NOT NULL")):
+        parsed = []
+        for role in roles.split(","):
+            role = " ".join(role.split())
+            if role and role not in parsed:
+                parsed.append(role)
+        rows.extend({"role": role, "freelancer_id": freelancer_id} for role in parsed)
+    if rows:
+        bind.execute(
+            sa.text("INSERT INTO freelancer_role (role, freelancer_id) VALUES (:role, :freelancer_id)"),
+            rows,
+        )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_freelancer_role_freelancer_id'), table_name='freelancer_role')
+    op.drop_table('freelancer_role')
@@ -0,0 +1,38 @@
+"""freelancer full-text search index
+
+Revision ID: 0006_freelancer_fts
+Revises: 0005_freelancer_role
+Create Date: 2026-10-17 21:34:52.107346
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_freelancer_fts'
+down_revision = '0005_freelancer_role'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite only; other databases fall back to /get_freelancers filters.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS freelancer_fts USING fts5("
+        "name, tagline, roles, location, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    op.execute(
+        "INSERT INTO freelancer_fts (rowid, name, tagline, roles, location) "
+        "SELECT id, COALESCE(first_name, '') || ' ' || COALESCE(last_name, '') || ' ' || COALESCE(username, ''), "
+        "COALESCE(tagline, ''), COALESCE(roles, ''), COALESCE(location, '') FROM freelancer"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS freelancer_fts")
@@ -0,0 +1,28 @@
+"""freelancer updated_at for card caching
+
+Revision ID: 0007_freelancer_updated_at
+Revises: 0006_freelancer_fts
+Create Date: 2026-10-17 22:08:31.552940
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_freelancer_updated_at'
+down_revision = '0006_freelancer_fts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('freelancer', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.get_bind().execute(sa.text("UPDATE freelancer SET updated_at = :now"), {"now": datetime.utcnow()})
+
+
+def downgrade():
+    with op.batch_alter_table('freelancer') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,45 @@
+"""per-participant conversation summaries and unread counts
+
+Revision ID: 0008_conversation_member
+Revises: 0007_freelancer_updated_at
+Create Date: 2026-10-17 23:41:07.206518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_conversation_member'
+down_revision = '0007_freelancer_updated_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversation_member',
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(length=10), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.Column('last_read_message_id', sa.Integer(), nullable=True),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('conversation_id', 'role')
+    )
+    op.create_index('ix_conversation_member_user_updated', 'conversation_member',
+                    ['role', 'user_id', 'updated_at'], unique=False)
+
+    # Backfill: there is no read history yet, so existing threads start read.
+    for role, column in (('client', 'client_id'), ('freelancer', 'freelancer_id')):
+        op.execute(
+            "INSERT INTO conversation_member (conversation_id, role, user_id, last_message_id, "
+            "last_read_message_id, unread_count, updated_at) "
+            f"SELECT id, '{role}', {column}, last_message_id, last_message_id, 0, updated_at "
+            "FROM conversation"
+        )
+
+
+def downgrade():
+    op.drop_index('ix_conversation_member_user_updated', table_name='conversation_member')
+    op.drop_table('conversation_member')
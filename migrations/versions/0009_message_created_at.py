@@ -0,0 +1,59 @@
+"""message created_at timestamps
+
+Revision ID: 0009_message_created_at
+Revises: 0008_conversation_member
+Create Date: 2026-10-18 00:27:45.913082
+
+"""
+from datetime import datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_message_created_at'
+down_revision = '0008_conversation_member'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('message', sa.Column('created_at', sa.DateTime(), nullable=True))
+
+    # Backfill: old rows only kept a local "%I:%M %p" string. Ids follow send
+    # order, so walk back from now and move to the previous day whenever the
+    # clock runs forwards. This is exact unless the site was silent for a day.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, time FROM message ORDER BY id DESC")).fetchall()
+    newer = datetime.now()
+    day = newer.date()
+    updates = []
+    for message_id, shown in rows:
+        try:
+            clock = datetime.strptime((shown or "").strip(), "%I:%M %p").time()
+        except ValueError:
+            stamp = newer
+        else:
+            stamp = datetime.combine(day, clock)
+            if stamp > newer:
+                day -= timedelta(days=1)
+                stamp = datetime.combine(day, clock)
+        newer = stamp
+        updates.append({"id": message_id, "created_at": stamp.astimezone(timezone.utc).replace(tzinfo=None)})
+
+    for start in range(0, len(updates), 5000):
+        bind.execute(sa.text("UPDATE message SET created_at = :created_at WHERE id = :id"),
+                     updates[start:start + 5000])
+
+    with op.batch_alter_table('message') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index(op.f('ix_message_created_at'), 'message', ['created_at'], unique=False)
+    op.create_index('ix_message_conv_id_created_at', 'message', ['conv_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_message_conv_id_created_at', table_name='message')
+    op.drop_index(op.f('ix_message_created_at'), table_name='message')
+    with op.batch_alter_table('message') as batch_op:
+        batch_op.drop_column('created_at')
@@ -0,0 +1,38 @@
+"""freelancer lowercased location key for indexed prefix filters
+
+Revision ID: 0010_freelancer_location_key
+Revises: 0009_message_created_at
+Create Date: 2026-10-18 09:14:06.271530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_freelancer_location_key'
+down_revision = '0009_message_created_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    key_type = sa.String(length=100).with_variant(sa.String(length=100, collation="C"), "postgresql")
+    op.add_column('freelancer', sa.Column('location_key', key_type, nullable=True))
+
+    # Lowercase in Python, as the model does; SQLite's lower() only folds ASCII.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, location FROM freelancer WHERE location IS NOT NULL")).all()
+    if rows:
+        bind.execute(sa.text("UPDATE freelancer SET location_key = :key WHERE id = :id"),
+                     [{"id": row_id, "key": location.lower()} for row_id, location in rows])
+
+    op.create_index(op.f('ix_freelancer_location_key'), 'freelancer', ['location_key'], unique=False)
+    op.drop_index(op.f('ix_freelancer_location'), table_name='freelancer')
+
+
+def downgrade():
+    op.create_index(op.f('ix_freelancer_location'), 'freelancer', ['location'], unique=False)
+    op.drop_index(op.f('ix_freelancer_location_key'), table_name='freelancer')
+    with op.batch_alter_table('freelancer') as batch_op:
+        batch_op.drop_column('location_key')
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from sqlalchemy.orm import object_session
+
+from caching import TTLCache
+from role_serving import LatencyStats
+
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small bounded thread pool instead of the request thread.
+
+    bcrypt releases the GIL, so PASSWORD_HASH_WORKERS caps how many cores a login
+    storm can take from each gunicorn worker; once PASSWORD_HASH_QUEUE hashes are
+    pending, further ones are refused with HashingOverloaded.
+    """
+
+    def __init__(self, bcrypt, app=None):
+        self.bcrypt = bcrypt
+        self.executor = None
+        self.max_pending = 0
+        self.timeout = None
+        self.rounds = None
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.latency = LatencyStats()
+        self.rejected = 0
+        self.timeouts = 0
+        self.rehashed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PASSWORD_HASH_WORKERS", int(os.environ.get("PASSWORD_HASH_WORKERS", 2)))
+        app.config.setdefault("PASSWORD_HASH_QUEUE", int(os.environ.get("PASSWORD_HASH_QUEUE", 16)))
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT", float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10)))
+        self.executor = ThreadPoolExecutor(max_workers=app.config["PASSWORD_HASH_WORKERS"],
+                                           thread_name_prefix="password-hash")
+        self.max_pending = app.config["PASSWORD_HASH_QUEUE"]
+        self.timeout = app.config["PASSWORD_HASH_TIMEOUT"]
+        # Flask-Bcrypt reads the same setting; it must be configured before bcrypt.init_app.
+        self.rounds = app.config.get("BCRYPT_LOG_ROUNDS", 12)
+        app.extensions["password_hasher"] = self
+
+    def run(self, fn, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingOverloaded("password hashing queue is full")
+            self.pending += 1
+        start = time.perf_counter()
+        try:
+            future = self.executor.submit(fn, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeout:
+                self.timeouts += 1
+                raise HashingOverloaded("password hashing timed out")
+        finally:
+            with self.lock:
+                self.pending -= 1
+            self.latency.observe(time.perf_counter() - start)
+
+    def generate(self, password):
+        return self.run(self.bcrypt.generate_password_hash, password).decode("utf-8")
+
+    def check(self, pw_hash, password):
+        return self.run(self.bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        # "$2b$12$..." carries the cost it was made with.
+        try:
+            return int(pw_hash.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def verify(self, user, password):
+        """Check a user's password, re-hashing it at the configured cost if that has changed."""
+        if user is None or not self.check(user.password, password):
+            return False
+        if self.needs_rehash(user.password):
+            user.password = self.generate(password)
+            object_session(user).commit()
+            self.rehashed += 1
+        return True
+
+    def stats(self):
+        return {
+            "workers": self.executor._max_workers if self.executor else 0,
+            "pending": self.pending,
+            "queue_limit": self.max_pending,
+            "rounds": self.rounds,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "rehashed": self.rehashed,
+            "latency": self.latency.summary(),
+        }
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets: `burst` attempts at once, refilled at `per_minute`."""
+
+    def __init__(self, burst, per_minute, maxsize=100000, clock=time.monotonic):
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.clock = clock
+        # A bucket left alone this long is full again, so expiring it loses nothing.
+        self.buckets = TTLCache(maxsize=maxsize, ttl=burst / self.rate if self.rate else 0, clock=clock)
+        self.lock = threading.Lock()
+        self.limited = 0
+
+    def allow(self, key):
+        now = self.clock()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.limited += 1
+            self.buckets.set(key, (tokens, now))
+        return allowed
+
+
+class LoginLimiter:
+    """Throttles password attempts per client IP and per account before any hashing."""
+
+    def __init__(self, app=None):
+        self.by_ip = None
+        self.by_account = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("LOGIN_IP_BURST", int(os.environ.get("LOGIN_IP_BURST", 20)))
+        app.config.setdefault("LOGIN_IP_PER_MINUTE", float(os.environ.get("LOGIN_IP_PER_MINUTE", 20)))
+        app.config.setdefault("LOGIN_ACCOUNT_BURST", int(os.environ.get("LOGIN_ACCOUNT_BURST", 5)))
+        app.config.setdefault("LOGIN_ACCOUNT_PER_MINUTE", float(os.environ.get("LOGIN_ACCOUNT_PER_MINUTE", 5)))
+        self.by_ip = TokenBucketLimiter(app.config["LOGIN_IP_BURST"], app.config["LOGIN_IP_PER_MINUTE"])
+        self.by_account = TokenBucketLimiter(app.config["LOGIN_ACCOUNT_BURST"], app.config["LOGIN_ACCOUNT_PER_MINUTE"])
+        app.extensions["login_limiter"] = self
+
+    def allow(self, ip, account=None):
+        if not self.by_ip.allow(ip):
+            return False
+        return account is None or self.by_account.allow(account.strip().lower())
+
+    def stats(self):
+        return {
+            "limited_by_ip": self.by_ip.limited,
+            "limited_by_account": self.by_account.limited,
+            "tracked_ips": len(self.by_ip.buckets),
+            "tracked_accounts": len(self.by_account.buckets),
+        }
@@ -0,0 +1,175 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import role_model
+
+# numpy is imported on first use, as in role_model.
+
+EMBED_CHUNK = 10000
+# Bumped when the embedding changes, so files built the old way are rebuilt.
+VECTOR_FORMAT = 2
+
+
+class ProfileIndex:
+    """Freelancer profile vectors in a memory-mapped .npy file shared by all workers.
+
+    Each record is (freelancer id, unit role-space vector); id 0 marks a free slot.
+    Profiles come in as (freelancer id, roles, tagline) and are embedded with
+    role_model.embed_profiles(); need statements with role_model.embed_needs().
+    """
+
+    def __init__(self, app=None):
+        self.path = None
+        self.table = None
+        self.stamp = None
+        self.digest = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault(
+            "PROFILE_VECTORS_PATH",
+            os.environ.get("PROFILE_VECTORS_PATH", os.path.join(app.instance_path, "profile_vectors.npy")),
+        )
+        self.path = app.config["PROFILE_VECTORS_PATH"]
+        app.extensions["profile_index"] = self
+
+    @contextmanager
+    def writing(self):
+        # Serialises writers across threads and gunicorn workers.
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self.write_lock, open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def model_digest(self):
+        if self.digest is None:
+            self.digest = role_model.model_digest()
+        return self.digest
+
+    def is_current(self):
+        try:
+            with open(self.path + ".json") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get("model") == self.model_digest() and meta.get("format") == VECTOR_FORMAT
+
+    def load(self):
+        """The mapped table, or None until it has been built for the current model."""
+        import numpy as np
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # Growth and rebuilds replace the file, so a new inode means remap. Appends
+        # in place are shared through the mapping and need no reload.
+        stamp = (st.st_ino, st.st_size)
+        if stamp != self.stamp:
+            with self.lock:
+                if stamp != self.stamp:
+                    self.table = np.load(self.path, mmap_mode="r+") if self.is_current() else None
+                    self.stamp = stamp
+        return self.table
+
+    def allocate(self, capacity, dim):
+        import numpy as np
+
+        dtype = np.dtype([("id", "<i8"), ("vec", "<f4", (dim,))])
+        return np.lib.format.open_memmap(self.path + ".tmp", mode="w+", dtype=dtype, shape=(capacity,))
+
+    def publish(self, table):
+        table.flush()
+        os.replace(self.path + ".tmp", self.path)
+        with open(self.path + ".json.tmp", "w") as f:
+            json.dump({"model": self.model_digest(), "format": VECTOR_FORMAT}, f)
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+        return self.load()
+
+    def build(self, rows):
+        rows = list(rows)
+        dim = len(role_model.role_index())
+        capacity = 1024
+        while capacity < len(rows) * 5 // 4:
+            capacity *= 2
+        table = self.allocate(capacity, dim)
+        for start in range(0, len(rows), EMBED_CHUNK):
+            chunk = rows[start:start + EMBED_CHUNK]
+            table["vec"][start:start + len(chunk)] = role_model.embed_profiles(
+                (roles, tagline) for _, roles, tagline in chunk)
+            table["id"][start:start + len(chunk)] = [freelancer_id for freelancer_id, _, _ in chunk]
+        return self.publish(table)
+
+    def rebuild(self, rows):
+        """Embed every (freelancer_id, roles, tagline) in rows and replace the index."""
+        with self.writing():
+            return self.build(rows)
+
+    def ensure(self, rows):
+        """Build the index from rows() if it is missing or was built by another model."""
+        if self.load() is None:
+            with self.writing():
+                if self.load() is None:
+                    self.build(rows())
+        return self.table
+
+    def grow(self, table):
+        grown = self.allocate(len(table) * 2, table["vec"].shape[1])
+        grown[:len(table)] = table
+        return self.publish(grown)
+
+    def add(self, freelancer_id, roles, tagline):
+        """Insert or replace one profile vector. Skipped until the index has been built."""
+        import numpy as np
+
+        with self.writing():
+            table = self.load()
+            if table is None:
+                return False
+            vector = role_model.embed_profiles([(roles, tagline)])[0]
+            slots = np.flatnonzero(table["id"] == freelancer_id)
+            if not len(slots):
+                slots = np.flatnonzero(table["id"] == 0)[:1]
+            if not len(slots):
+                slots = [len(table)]
+                table = self.grow(table)
+            # Vector first, id last: readers only score slots with a live id.
+            table["vec"][slots[0]] = vector
+            table["id"][slots[0]] = freelancer_id
+            return True
+
+    def remove(self, freelancer_id):
+        with self.writing():
+            table = self.load()
+            if table is None:
+                return
+            slots = table["id"] == freelancer_id
+            table["id"][slots] = 0
+            table["vec"][slots] = 0
+
+    def search(self, text, k=10):
+        """Return [(freelancer_id, cosine similarity)] best first, positive similarities only."""
+        import numpy as np
+
+        table = self.load()
+        if table is None or k < 1:
+            return []
+        query = role_model.embed_needs([text])[0]
+        if not query.any():
+            return []
+        # Free and removed slots hold zero vectors, so they score 0 and drop out below.
+        scores = table["vec"] @ query
+        k = min(k, len(scores))
+        top = np.argpartition(scores, len(scores) - k)[-k:]
+        ids = table["id"]
+        top = top[np.lexsort((ids[top], -scores[top]))]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > 0 and ids[i] > 0]
@@ -0,0 +1,291 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import Response, abort, jsonify, request, send_from_directory
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Counters of the request being handled; read by the SQL hooks without going through flask.g.
+current = ContextVar("request_metrics", default=None)
+
+
+def label_string(keys, values):
+    return ",".join(f'{key}="{value}"' for key, value in zip(keys, values))
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self.lock:
+            series = [(labels, list(counts), count, total) for labels, (counts, count, total) in self.series.items()]
+        for labels, counts, count, total in sorted(series):
+            names = label_string(self.labels, labels)
+            prefix = names + "," if names else ""
+            suffix = f"{{{names}}}" if names else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}'
+            yield f"{self.name}_sum{suffix} {total:.6f}"
+            yield f"{self.name}_count{suffix} {count}"
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + 1
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self.lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            yield f"{self.name}{{{label_string(self.labels, labels)}}} {value}"
+
+
+class RequestMetrics:
+    """Opt-in (METRICS_ENABLED=1) per-endpoint timings, SQL query counts and response sizes.
+
+    Served in Prometheus text format at /metrics. Requests can be profiled with
+    cProfile: a METRICS_PROFILE_RATE fraction of them at random, or the next few
+    to an endpoint after POST /metrics/profile?endpoint=...&count=N. Dumps are
+    listed at GET /metrics/profile and shown as pstats text per file.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.token = None
+        self.profile_rate = 0.0
+        self.profile_dir = None
+        self.profile_keep = 20
+        self.query_warn = 0
+        self.armed = {}
+        self.profiling = threading.Lock()
+        self.lock = threading.Lock()
+        self.duration = Histogram("collabworks_request_duration_seconds",
+                                  "Time to build the response.", DURATION_BUCKETS, ("endpoint", "method"))
+        self.queries = Histogram("collabworks_request_sql_queries",
+                                 "SQL statements executed per request.", QUERY_BUCKETS, ("endpoint",))
+        self.sql_time = Histogram("collabworks_request_sql_seconds",
+                                  "Time spent in SQL statements per request.", DURATION_BUCKETS, ("endpoint",))
+        self.size = Histogram("collabworks_response_size_bytes",
+                              "Response body size (streamed responses are not counted).", SIZE_BUCKETS, ("endpoint",))
+        self.inference = Histogram("collabworks_inference_seconds",
+                                   "Model inference time per call.", DURATION_BUCKETS, ("model",))
+        self.requests = Counter("collabworks_requests_total", "Requests by status code.",
+                                ("endpoint", "method", "status"))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", os.environ.get("METRICS_ENABLED", "0") == "1")
+        # Required with METRICS_ENABLED: /metrics routes need "Authorization: Bearer <token>".
+        app.config.setdefault("METRICS_TOKEN", os.environ.get("METRICS_TOKEN"))
+        app.config.setdefault("METRICS_PROFILE_RATE", float(os.environ.get("METRICS_PROFILE_RATE", 0)))
+        app.config.setdefault("METRICS_PROFILE_DIR", os.environ.get(
+            "METRICS_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "collabworks-profiles")))
+        app.config.setdefault("METRICS_PROFILE_KEEP", int(os.environ.get("METRICS_PROFILE_KEEP", 20)))
+        # Log requests that run more statements than this (0 disables).
+        app.config.setdefault("METRICS_QUERY_WARN", int(os.environ.get("METRICS_QUERY_WARN", 50)))
+        app.extensions["request_metrics"] = self
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        if not app.config["METRICS_TOKEN"]:
+            # The routes can arm cProfile and download profile dumps of the live app.
+            raise RuntimeError("METRICS_ENABLED=1 requires METRICS_TOKEN")
+        self.enabled = True
+        self.token = app.config["METRICS_TOKEN"]
+        self.profile_rate = app.config["METRICS_PROFILE_RATE"]
+        self.profile_dir = app.config["METRICS_PROFILE_DIR"]
+        self.profile_keep = app.config["METRICS_PROFILE_KEEP"]
+        self.query_warn = app.config["METRICS_QUERY_WARN"]
+        self.logger = app.logger
+
+        if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.teardown_request(self.teardown_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+        app.add_url_rule("/metrics/profile", "metrics_profiles", self.profiles_view, methods=["GET", "POST"])
+        app.add_url_rule("/metrics/profile/<name>", "metrics_profile", self.profile_view)
+
+    @contextmanager
+    def timer(self, model):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inference.observe(time.perf_counter() - start, model)
+
+    def start_request(self):
+        state = {"start": time.perf_counter(), "queries": 0, "sql": 0.0, "profiler": None}
+        current.set(state)
+        # One profiled request at a time; cProfile slows the whole worker.
+        if self.profiling.acquire(blocking=False):
+            if self.should_profile(request.endpoint):
+                state["profiler"] = cProfile.Profile()
+                state["profiler"].enable()
+            else:
+                self.profiling.release()
+
+    def should_profile(self, endpoint):
+        if endpoint is None or endpoint.startswith("metrics"):
+            return False
+        with self.lock:
+            for key in (endpoint, "*"):
+                if self.armed.get(key):
+                    self.armed[key] -= 1
+                    return True
+        return self.profile_rate > 0 and random.random() < self.profile_rate
+
+    def finish_request(self, response):
+        state = current.get()
+        if state is None:
+            return response
+        current.set(None)
+        elapsed = time.perf_counter() - state["start"]
+        endpoint = request.endpoint or "unmatched"
+        if state["profiler"] is not None:
+            state["profiler"].disable()
+            self.profiling.release()
+            response.headers["X-Profile"] = self.dump(state["profiler"], endpoint, elapsed, state["queries"])
+        self.duration.observe(elapsed, endpoint, request.method)
+        self.queries.observe(state["queries"], endpoint)
+        self.sql_time.observe(state["sql"], endpoint)
+        if not response.is_streamed:
+            self.size.observe(response.calculate_content_length() or 0, endpoint)
+        self.requests.inc(endpoint, request.method, str(response.status_code))
+        if self.query_warn and state["queries"] > self.query_warn:
+            self.logger.warning("%s %s ran %d SQL statements (%.1f ms)", request.method, request.path,
+                                state["queries"], state["sql"] * 1000)
+        return response
+
+    def teardown_request(self, exc):
+        # after_request did not run (an after_request hook raised); never leave the profiler running.
+        state = current.get()
+        current.set(None)
+        if state is not None and state["profiler"] is not None:
+            state["profiler"].disable()
+            self.profiling.release()
+
+    def dump(self, profiler, endpoint, elapsed, queries):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        name = f"{stamp}-{endpoint}-{int(elapsed * 1000)}ms-{queries}q-{os.getpid()}.prof"
+        profiler.dump_stats(os.path.join(self.profile_dir, name))
+        for old in self.profile_files()[self.profile_keep:]:
+            try:
+                os.remove(os.path.join(self.profile_dir, old))
+            except OSError:
+                pass
+        return name
+
+    def profile_files(self):
+        try:
+            files = [f for f in os.listdir(self.profile_dir) if f.endswith(".prof")]
+        except OSError:
+            return []
+        return sorted(files, reverse=True)
+
+    def authorize(self):
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {self.token}".encode()):
+            abort(401)
+
+    def metrics_view(self):
+        self.authorize()
+        lines = []
+        for metric in (self.requests, self.duration, self.queries, self.sql_time, self.size, self.inference):
+            lines.extend(metric.lines())
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+    def profiles_view(self):
+        self.authorize()
+        if request.method == "POST":
+            endpoint = request.args.get("endpoint", "*")
+            count = request.args.get("count", 1, type=int)
+            with self.lock:
+                self.armed[endpoint] = self.armed.get(endpoint, 0) + max(count, 1)
+        with self.lock:
+            armed = dict(self.armed)
+        return jsonify({"armed": armed, "profiles": self.profile_files()})
+
+    def profile_view(self, name):
+        self.authorize()
+        if name not in self.profile_files():
+            abort(404)
+        if request.args.get("format") == "raw":
+            # Load with `python -m pstats` or snakeviz.
+            return send_from_directory(self.profile_dir, name, as_attachment=True)
+        sort = request.args.get("sort", "cumulative")
+        limit = request.args.get("limit", 40, type=int)
+        if sort not in pstats.Stats.sort_arg_dict_default or limit < 1:
+            return jsonify({"error": "unknown sort key or bad limit",
+                            "sort_keys": sorted(pstats.Stats.sort_arg_dict_default)}), 400
+        out = io.StringIO()
+        stats = pstats.Stats(os.path.join(self.profile_dir, name), stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return Response(out.getvalue(), mimetype="text/plain")
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Statements from background writers run outside any request and are not attributed.
+    state = current.get()
+    if state is not None and context is not None:
+        state["queries"] += 1
+        state["sql"] += time.perf_counter() - getattr(context, "_metrics_start", time.perf_counter())
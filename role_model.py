@@ -0,0 +1,160 @@
+import hashlib
+import os
+import threading
+
+# joblib, numpy and scikit-learn are imported on first use so that workers
+# which never serve a prediction do not pay for them at boot.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_FILES = ("role_predictor_new.pkl", "mlb_new.pkl", "thresholds_new.pkl")
+
+clf = None
+mlb = None
+thresholds = None
+thresholds_array = None
+weights = None
+class_index = None
+
+_load_lock = threading.Lock()
+
+
+def model_path(name):
+    return os.path.join(BASE_DIR, name)
+
+
+def is_loaded():
+    return thresholds_array is not None
+
+
+def load_models():
+    global clf, mlb, thresholds, thresholds_array
+    if thresholds_array is None:
+        with _load_lock:
+            if thresholds_array is None:
+                import joblib
+                import numpy as np
+
+                clf = joblib.load(model_path("role_predictor_new.pkl"))
+                mlb = joblib.load(model_path("mlb_new.pkl"))
+                thresholds = joblib.load(model_path("thresholds_new.pkl"))
+                # Published last: readers treat a non-None thresholds_array as fully loaded.
+                thresholds_array = np.asarray(thresholds, dtype=float)
+    return clf, mlb, thresholds_array
+
+
+def warm_up(background=True):
+    if not background:
+        load_models()
+        return None
+    thread = threading.Thread(target=load_models, name="role-model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def model_digest():
+    digest = hashlib.sha256()
+    for name in MODEL_FILES:
+        with open(model_path(name), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def predict_roles_batch(texts, top_n=3):
+    texts = list(texts)
+    if not texts:
+        return []
+
+    import numpy as np
+
+    clf, mlb, thresholds_array = load_models()
+    probas = clf.predict_proba(texts)
+    scores = np.where(probas >= thresholds_array, probas, -1.0)
+    k = max(min(top_n, scores.shape[1]), 0)
+    top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    passed = np.take_along_axis(scores, top, axis=1) >= 0
+
+    classes = mlb.classes_
+    return [list(classes[row[mask]]) for row, mask in zip(top, passed)]
+
+
+def role_weights():
+    # Stacked per-role logistic regressions. The one-vs-rest classifier is multilabel, so its
+    # predict_proba is just each role's sigmoid; one sparse product replaces 79 estimator calls.
+    global weights
+    if weights is None:
+        import numpy as np
+
+        clf, _, _ = load_models()
+        estimators = clf.named_steps["clf"].estimators_
+        coef = np.ascontiguousarray(np.vstack([e.coef_[0] for e in estimators]).T, dtype=np.float32)
+        weights = coef, np.array([e.intercept_[0] for e in estimators])
+    return weights
+
+
+def role_probabilities(texts):
+    """clf.predict_proba(texts) to float32 precision, without the per-estimator overhead."""
+    import numpy as np
+
+    clf, _, _ = load_models()
+    coef, intercept = role_weights()
+    logits = np.asarray(clf.named_steps["tfidf"].transform(texts) @ coef) + intercept
+    return 1 / (1 + np.exp(-logits))
+
+
+def role_baseline():
+    # What the classifiers answer for a text with no known words: the base rate of each role.
+    import numpy as np
+
+    _, intercept = role_weights()
+    return 1 / (1 + np.exp(-intercept))
+
+
+def role_index():
+    global class_index
+    if class_index is None:
+        _, mlb, _ = load_models()
+        class_index = {role: i for i, role in enumerate(mlb.classes_)}
+    return class_index
+
+
+def unit_rows(vectors):
+    import numpy as np
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+
+def role_lift(texts):
+    # How far each role's probability rises above its base rate; the shared role space.
+    import numpy as np
+
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, len(role_index())))
+    return np.clip(role_probabilities(texts) - role_baseline(), 0, None)
+
+
+def embed_needs(texts):
+    """Unit role-space vectors; texts the model knows nothing about map to zero."""
+    return unit_rows(role_lift(texts))
+
+
+def embed_profiles(profiles):
+    """Unit role-space vectors for (roles, tagline) pairs, comparable with embed_needs().
+
+    The listed roles the model knows make up a unit vector. The tagline's lift is added
+    unscaled, so it only outweighs the roles when the model is confident about it, and
+    still places profiles whose roles the model lacks.
+    """
+    import numpy as np
+
+    profiles = list(profiles)
+    index = role_index()
+    listed = np.zeros((len(profiles), len(index)), dtype=np.float32)
+    for row, (roles, _) in enumerate(profiles):
+        for role in (roles or "").split(","):
+            column = index.get(" ".join(role.split()))
+            if column is not None:
+                listed[row, column] = 1
+    return unit_rows(unit_rows(listed) + role_lift(tagline or "" for _, tagline in profiles))
@@ -0,0 +1,321 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import role_model
+
+
+class ServingOverloaded(Exception):
+    pass
+
+
+class LatencyStats:
+    def __init__(self, window=2048):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def summary(self):
+        with self.lock:
+            samples = sorted(self.samples)
+            count, total = self.count, self.total
+
+        def pct(q):
+            if not samples:
+                return 0.0
+            return round(samples[min(int(q * len(samples)), len(samples) - 1)] * 1000, 3)
+
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+        }
+
+
+class MicroBatcher:
+    """Collects concurrent single-statement requests into one predict call."""
+
+    def __init__(self, predict_many, max_batch=32, max_wait=0.005, max_queue=256, max_inflight=1):
+        self.predict_many = predict_many
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.inflight = threading.BoundedSemaphore(max_inflight)
+        self.executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="role-batch")
+        self.latency = LatencyStats()
+        self.batch_sizes = deque(maxlen=2048)
+        self.batches = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.started = False
+
+    def ensure_started(self):
+        if not self.started:
+            with self.lock:
+                if not self.started:
+                    threading.Thread(target=self.run, name="role-batcher", daemon=True).start()
+                    self.started = True
+
+    def submit_many(self, texts, top_n):
+        self.ensure_started()
+        futures = []
+        now = time.perf_counter()
+        for text in texts:
+            future = Future()
+            try:
+                self.queue.put_nowait((text, top_n, future, now))
+            except queue.Full:
+                self.rejected += 1
+                for f in futures:
+                    f.cancel()
+                raise ServingOverloaded("role prediction queue is full")
+            futures.append(future)
+        return futures
+
+    def submit(self, text, top_n, timeout=None):
+        return self.collect(self.submit_many([text], top_n), timeout)[0]
+
+    def collect(self, futures, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            return [f.result(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+                    for f in futures]
+        except FutureTimeout:
+            self.timeouts += 1
+            for f in futures:
+                f.cancel()
+            raise ServingOverloaded("role prediction timed out")
+
+    def run(self):
+        while True:
+            first = self.queue.get()
+            # Wait for a free slot first so requests keep piling into the
+            # queue while every worker is busy, then take them all at once.
+            self.inflight.acquire()
+            items = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    items.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [item for item in items if item[2].set_running_or_notify_cancel()]
+            if not items:
+                self.inflight.release()
+                continue
+            self.executor.submit(self.run_batch, items)
+
+    def run_batch(self, items):
+        try:
+            results = self.predict_many([item[0] for item in items], max(item[1] for item in items))
+        except Exception as e:
+            self.errors += 1
+            for item in items:
+                item[2].set_exception(e)
+        else:
+            # Top-n selection keeps the best roles first, so a smaller top_n is a prefix.
+            done = time.perf_counter()
+            for (text, top_n, future, start), roles in zip(items, results):
+                future.set_result(list(roles)[:top_n])
+                self.latency.observe(done - start)
+        finally:
+            self.batches += 1
+            self.batch_sizes.append(len(items))
+            self.inflight.release()
+
+    def stats(self):
+        sizes = list(self.batch_sizes)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_limit": self.queue.maxsize,
+            "batches": self.batches,
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "max_batch_size": max(sizes) if sizes else 0,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "latency": self.latency.summary(),
+        }
+
+
+def pool_backend(pool_size):
+    executor = None
+    lock = threading.Lock()
+
+    def predict_many(texts, top_n):
+        nonlocal executor
+        if executor is None:
+            with lock:
+                if executor is None:
+                    executor = ProcessPoolExecutor(
+                        max_workers=pool_size,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=role_model.load_models,
+                    )
+        return executor.submit(role_model.predict_roles_batch, list(texts), top_n).result()
+
+    return predict_many
+
+
+def socket_backend(path, timeout):
+    def predict_many(texts, top_n):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            try:
+                sock.connect(path)
+                stream = sock.makefile("rwb")
+                stream.write(json.dumps({"texts": list(texts), "top_n": top_n}).encode() + b"\n")
+                stream.flush()
+                reply = json.loads(stream.readline())
+            except socket.timeout:
+                raise ServingOverloaded("role prediction sidecar timed out")
+        if "error" in reply:
+            # Same 503 as pool mode when the sidecar's queue is full or it timed out.
+            if reply.get("type") == "overloaded":
+                raise ServingOverloaded(reply["error"])
+            raise RuntimeError(reply["error"])
+        return reply["roles"]
+
+    return predict_many
+
+
+class RoleService:
+    def __init__(self, mode="inline", pool_size=2, max_batch=32, max_wait_ms=5, queue_depth=256,
+                 socket_path=None, timeout=5.0):
+        self.mode = mode
+        self.timeout = timeout
+        self.latency = LatencyStats()
+        self.batcher = None
+
+        if mode == "inline":
+            self.backend = role_model.predict_roles_batch
+            return
+        if mode == "pool":
+            self.backend = pool_backend(pool_size)
+            inflight = pool_size
+        elif mode == "socket":
+            self.backend = socket_backend(socket_path, timeout)
+            inflight = pool_size
+        else:
+            raise ValueError(f"Unknown ROLE_SERVING_MODE: {mode}")
+        self.batcher = MicroBatcher(
+            self.backend,
+            max_batch=max_batch,
+            max_wait=max_wait_ms / 1000,
+            max_queue=queue_depth,
+            max_inflight=inflight,
+        )
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            mode=config['ROLE_SERVING_MODE'],
+            pool_size=config['ROLE_POOL_SIZE'],
+            max_batch=config['ROLE_MAX_BATCH'],
+            max_wait_ms=config['ROLE_BATCH_WAIT_MS'],
+            queue_depth=config['ROLE_QUEUE_DEPTH'],
+            socket_path=config['ROLE_SERVING_SOCKET'],
+            timeout=config['ROLE_SERVING_TIMEOUT'],
+        )
+
+    def predict(self, text, top_n):
+        start = time.perf_counter()
+        if self.batcher is None:
+            roles = self.backend([text], top_n)[0]
+        else:
+            roles = self.batcher.submit(text, top_n, timeout=self.timeout)
+        self.latency.observe(time.perf_counter() - start)
+        return roles
+
+    def predict_many(self, texts, top_n):
+        if self.batcher is None:
+            return self.backend(list(texts), top_n)
+        # Through the batcher, so batch calls count against ROLE_QUEUE_DEPTH like single ones.
+        # Batches larger than the queue go in queue-sized chunks rather than being always refused.
+        texts, roles = list(texts), []
+        chunk = self.batcher.queue.maxsize or len(texts) or 1
+        for start in range(0, len(texts), chunk):
+            futures = self.batcher.submit_many(texts[start:start + chunk], top_n)
+            roles.extend(self.batcher.collect(futures, timeout=self.timeout))
+        return roles
+
+    def stats(self):
+        stats = {"mode": self.mode, "latency": self.latency.summary()}
+        if self.batcher is not None:
+            stats["batcher"] = self.batcher.stats()
+        return stats
+
+
+class SidecarHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                batcher = self.server.batcher
+                futures = batcher.submit_many(request["texts"], int(request.get("top_n", 3)))
+                reply = {"roles": batcher.collect(futures, self.server.timeout)}
+            except ServingOverloaded as e:
+                reply = {"error": str(e), "type": "overloaded"}
+            except Exception as e:
+                reply = {"error": str(e), "type": "error"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path, pool_size=1, max_batch=64, max_wait_ms=5, queue_depth=1024, timeout=None):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    if pool_size > 1:
+        backend = pool_backend(pool_size)
+    else:
+        role_model.load_models()
+        backend = role_model.predict_roles_batch
+
+    server = SidecarServer(socket_path, SidecarHandler)
+    server.batcher = MicroBatcher(backend, max_batch=max_batch, max_wait=max_wait_ms / 1000,
+                                  max_queue=queue_depth, max_inflight=max(pool_size, 1))
+    server.timeout = timeout
+    print(f"role prediction sidecar listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared role prediction sidecar for gunicorn workers")
+    parser.add_argument("--socket", default=os.environ.get("ROLE_SERVING_SOCKET", "/tmp/collabworks-roles.sock"))
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--queue-depth", type=int, default=1024)
+    parser.add_argument("--timeout", type=float, default=float(os.environ.get("ROLE_SERVING_TIMEOUT", 5)))
+    args = parser.parse_args()
+    serve(args.socket, args.pool_size, args.max_batch, args.max_wait_ms, args.queue_depth, args.timeout)
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="collabworks-test-"), "test.db"))
+
+import pytest
+
+from app import app as flask_app, fragment_cache
+from client_routes import Client
+from extensions import db, user_cache
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True)
+    # Requests push their own app context; holding one here would share flask.g between them.
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.drop_all()
+    fragment_cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def make_user(app):
+    def make(model, id, username):
+        if model is Client:
+            fields = {"unique_id": f"{username}-uid"}
+        else:
+            fields = {"first_name": username, "last_name": "Test"}
+        with app.app_context():
+            user = model(id=id, username=username, email=f"{username}@example.com", password="x", **fields)
+            db.session.add(user)
+            db.session.commit()
+            user.get_id()  # load the columns before the session closes
+        return user
+    return make
+
+
+@pytest.fixture
+def login():
+    def login(client, user):
+        with client.session_transaction() as session:
+            session["_user_id"] = user.get_id()
+            session["_fresh"] = True
+    return login
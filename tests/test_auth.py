@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import load_user
+from client_routes import Client
+from extensions import db, user_cache
+from freelancer_routes import Freelancer
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_typed_ids_resolve_to_their_own_table(app, make_user):
+    make_user(Client, 5, "alice_user")
+    make_user(Freelancer, 5, "fred_user")
+    with app.test_request_context():
+        assert load_user("client:5").username == "alice_user"
+        assert load_user("freelancer:5").username == "fred_user"
+
+
+def test_untyped_legacy_ids_are_signed_out(app, make_user):
+    make_user(Client, 5, "alice_user")
+    make_user(Freelancer, 5, "fred_user")
+    with app.test_request_context():
+        assert load_user("5") is None
+        assert load_user("admin:5") is None
+
+
+def test_at_most_one_query_per_request_to_load_the_user(app, make_user, login):
+    browser = app.test_client()
+    login(browser, make_user(Freelancer, 5, "fred_user"))
+
+    for cached in (False, True):
+        if not cached:
+            user_cache.clear()
+        with count_queries(app) as statements:
+            page = browser.get("/header")
+        assert b"fred_user" in page.data
+        assert len(statements) <= 1, statements
+    assert statements == []
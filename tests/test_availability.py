@@ -0,0 +1,44 @@
+import client_routes
+import freelancer_routes
+from client_routes import Client
+from freelancer_routes import Freelancer
+
+
+def register_client(browser, username, email):
+    return browser.post("/client/register", data={"username": username, "email": email, "first_name": "Zed",
+                                                  "last_name": "Test", "password": "password123"})
+
+
+def test_registration_checks_the_database_when_the_filter_lags(app, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", False)
+    monkeypatch.setattr(client_routes.taken_usernames, "filter", None)
+    browser = app.test_client()
+    assert browser.get("/client/check_username?username=zed_user").json == {"available": True}
+
+    # Registered through another worker: this worker's filter has not picked it up yet.
+    make_user(Client, 7, "zed_user")
+    assert register_client(browser, "zed_user", "other@example.com").status_code == 200
+    with app.app_context():
+        assert Client.query.filter_by(username="zed_user").count() == 1
+
+    monkeypatch.setitem(app.config, "AVAILABILITY_REFRESH_SECONDS", 0)
+    assert browser.get("/client/check_username?username=zed_user").json == {"available": False}
+
+
+def test_concurrent_duplicate_registration_is_refused(app, make_user, monkeypatch):
+    # Both requests passed form validation before either committed.
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", False)
+    monkeypatch.setattr(client_routes.ClientRegisterForm, "validate_username", lambda form, field: None)
+    monkeypatch.setattr(freelancer_routes.FreelancerRegisterForm, "validate_username", lambda form, field: None)
+    make_user(Client, 7, "zed_user")
+    make_user(Freelancer, 7, "fred_user")
+    browser = app.test_client()
+
+    assert register_client(browser, "zed_user", "other@example.com").status_code == 200
+    response = browser.post("/freelancer/register", data={
+        "username": "fred_user", "email": "other@example.com", "first_name": "Fred", "last_name": "Test",
+        "password": "password123", "roles": "Plumber", "location": "Austin"})
+    assert response.status_code == 200
+    with app.app_context():
+        assert Client.query.filter_by(username="zed_user").count() == 1
+        assert Freelancer.query.filter_by(username="fred_user").count() == 1
@@ -0,0 +1,190 @@
+import json
+import random
+import threading
+import time
+
+import app as app_module
+from app import Conversation, ConversationMember, Message
+from client_routes import Client
+from extensions import db
+from freelancer_routes import Freelancer
+
+
+def make_conversation(app, make_user):
+    client = make_user(Client, 1, "alice_user")
+    freelancer = make_user(Freelancer, 1, "fred_user")
+    with app.app_context():
+        db.session.add(Conversation(id=1, client_id=client.id, freelancer_id=freelancer.id))
+        db.session.commit()
+    return client, freelancer
+
+
+def test_streams_over_the_cap_get_503(app, make_user, login, monkeypatch):
+    client, _ = make_conversation(app, make_user)
+    monkeypatch.setattr(app_module, "stream_slots", threading.BoundedSemaphore(1))
+    browser = app.test_client()
+    login(browser, client)
+
+    first = browser.get("/chat/1/stream", buffered=False)
+    assert first.status_code == 200
+    refused = browser.get("/chat/1/stream", buffered=False)
+    assert refused.status_code == 503
+    assert refused.headers["Retry-After"]
+
+    first.close()
+    again = browser.get("/chat/1/stream", buffered=False)
+    assert again.status_code == 200
+    again.close()
+
+
+def test_receive_is_limited_to_participants(app, make_user, login):
+    client, _ = make_conversation(app, make_user)
+    outsider = make_user(Client, 2, "mallory_user")
+    browser = app.test_client()
+
+    login(browser, outsider)
+    assert browser.get("/receive/1").status_code == 404
+    assert browser.get("/receive/99").status_code == 404
+    with app.app_context():
+        assert Message.query.count() == 0
+
+    login(browser, client)
+    assert browser.get("/receive/1").status_code == 200
+    with app.app_context():
+        assert Message.query.count() == 1
+
+
+def test_partial_read_counts_the_other_sides_messages_when_ids_collide(app, make_user, login):
+    # Client 1 and freelancer 1 share the raw id "1" in Message.user.
+    client, freelancer = make_conversation(app, make_user)
+    with app.app_context():
+        db.session.add_all([ConversationMember(conversation_id=1, role="client", user_id=client.id),
+                            ConversationMember(conversation_id=1, role="freelancer", user_id=freelancer.id)])
+        db.session.commit()
+
+    freelancer_browser, client_browser = app.test_client(), app.test_client()
+    login(freelancer_browser, freelancer)
+    login(client_browser, client)
+    ids = []
+    for text in ("one", "two", "three"):
+        response = freelancer_browser.post("/send", json={"conv_id": 1, "text": text, "user": "1",
+                                                          "receiver_id": client.unique_id})
+        assert response.status_code == 200
+        ids.append(response.json["message"]["id"])
+
+    with app.app_context():
+        assert db.session.get(ConversationMember, (1, "client")).unread_count == 3
+    assert client_browser.post("/chat/1/read", json={"last_id": ids[0]}).status_code == 200
+    with app.app_context():
+        assert db.session.get(ConversationMember, (1, "client")).unread_count == 2
+
+
+def test_mark_read_keeps_increments_committed_while_it_runs(app, make_user, login):
+    client, freelancer = make_conversation(app, make_user)
+    with app.app_context():
+        db.session.add_all([ConversationMember(conversation_id=1, role="client", user_id=client.id),
+                            ConversationMember(conversation_id=1, role="freelancer", user_id=freelancer.id)])
+        db.session.commit()
+    freelancer_browser, client_browser = app.test_client(), app.test_client()
+    login(freelancer_browser, freelancer)
+    login(client_browser, client)
+    first = freelancer_browser.post("/send", json={"conv_id": 1, "text": "one", "user": "1",
+                                                   "receiver_id": client.unique_id}).json["message"]["id"]
+    freelancer_browser.post("/send", json={"conv_id": 1, "text": "two", "user": "1", "receiver_id": client.unique_id})
+
+    # A group commit from another connection lands after each read mark_read makes.
+    injecting = threading.local()
+
+    def commit_a_message(conn, cursor, statement, parameters, context, executemany):
+        if getattr(injecting, "active", False) or not statement.lstrip().upper().startswith("SELECT"):
+            return
+        injecting.active = True
+        try:
+            with db.engine.begin() as other:
+                message_id = other.execute(db.insert(Message).values(
+                    conv_id=1, user="1", receiver_id=client.unique_id, from_me=True, text="late")).inserted_primary_key[0]
+                app_module.record_messages(other, [{"conv": 1, "sender": "freelancer", "message_id": message_id}])
+        finally:
+            injecting.active = False
+
+    with app.app_context():
+        db.event.listen(db.engine, "after_cursor_execute", commit_a_message)
+    try:
+        assert client_browser.post("/chat/1/read", json={"last_id": first}).status_code == 200
+    finally:
+        with app.app_context():
+            db.event.remove(db.engine, "after_cursor_execute", commit_a_message)
+
+    with app.app_context():
+        member = db.session.get(ConversationMember, (1, "client"))
+        after = Message.query.filter(Message.conv_id == 1, Message.id > first).count()
+        assert after > 1
+        assert (member.last_read_message_id, member.unread_count) == (first, after)
+
+
+def read_stream(response, events, expected, deadline):
+    # Collect message ids from an open SSE response until all arrive or time runs out.
+    for chunk in response.response:
+        for line in chunk.decode().splitlines() if isinstance(chunk, bytes) else chunk.splitlines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):])["id"])
+        if len(set(events)) >= expected or time.monotonic() > deadline:
+            break
+
+
+def test_concurrent_sends_all_reach_an_open_stream(app, make_user, login, monkeypatch):
+    client, freelancer = make_conversation(app, make_user)
+    monkeypatch.setitem(app.config, "CHAT_STREAM_KEEPALIVE", 0.2)
+    publish = app_module.chat_hub.publish
+
+    def late_publish(channel, payload):
+        # Each /send publishes from its own request thread; jitter makes them arrive out of id order.
+        time.sleep(random.uniform(0, 0.05))
+        publish(channel, payload)
+
+    monkeypatch.setattr(app_module.chat_hub, "publish", late_publish)
+    reader = app.test_client()
+    login(reader, client)
+    stream = reader.get("/chat/1/stream", buffered=False)
+    assert stream.status_code == 200
+
+    sent, events = [], []
+    listener = threading.Thread(target=read_stream, args=(stream, events, 20, time.monotonic() + 20))
+    listener.start()
+
+    def send(i):
+        browser = app.test_client()
+        login(browser, freelancer)
+        response = browser.post("/send", json={"conv_id": 1, "text": f"message {i}", "user": "1",
+                                               "receiver_id": client.unique_id})
+        assert response.status_code == 200
+        sent.append(response.json["message"]["id"])
+
+    senders = [threading.Thread(target=send, args=(i,)) for i in range(20)]
+    for thread in senders:
+        thread.start()
+    for thread in senders:
+        thread.join()
+    listener.join()
+    stream.close()
+
+    assert len(sent) == 20
+    assert sorted(set(events)) == sorted(sent)
+
+
+def test_reconnect_replays_recent_messages_below_after_id(app, make_user, login):
+    # A message committed late (below the highest id the page saw) is still replayed on reconnect.
+    client, freelancer = make_conversation(app, make_user)
+    browser = app.test_client()
+    login(browser, freelancer)
+    ids = [browser.post("/send", json={"conv_id": 1, "text": text, "user": "1",
+                                       "receiver_id": client.unique_id}).json["message"]["id"]
+           for text in ("late", "early")]
+
+    reader = app.test_client()
+    login(reader, client)
+    stream = reader.get(f"/chat/1/stream?after_id={ids[1]}", buffered=False)
+    events = []
+    read_stream(stream, events, 2, time.monotonic() + 5)
+    stream.close()
+    assert ids[0] in events
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from message_writer import GroupCommitWriter, WriterOverloaded
+from test_chat import make_conversation, read_stream
+
+
+def test_group_commit_publishes_every_message_in_id_order(app, make_user, login, monkeypatch):
+    client, freelancer = make_conversation(app, make_user)
+    monkeypatch.setitem(app.config, "CHAT_STREAM_KEEPALIVE", 0.2)
+    writer = GroupCommitWriter(app_module.write_messages, app=app, max_wait=0.005,
+                               on_commit=app_module.publish_messages)
+    monkeypatch.setattr(app_module, "message_writer", writer)
+
+    reader = app.test_client()
+    login(reader, client)
+    stream = reader.get("/chat/1/stream", buffered=False)
+    sent, events = [], []
+    listener = threading.Thread(target=read_stream, args=(stream, events, 20, time.monotonic() + 20))
+    listener.start()
+
+    def send(i):
+        browser = app.test_client()
+        login(browser, freelancer)
+        response = browser.post("/send", json={"conv_id": 1, "text": f"message {i}", "user": "1",
+                                               "receiver_id": client.unique_id})
+        assert response.status_code == 200
+        sent.append(response.json["message"]["id"])
+
+    senders = [threading.Thread(target=send, args=(i,)) for i in range(20)]
+    for thread in senders:
+        thread.start()
+    for thread in senders:
+        thread.join()
+    listener.join()
+    stream.close()
+
+    assert sorted(sent) == events
+    assert writer.batches < 20
+
+
+def test_timeouts_never_leave_a_row_to_be_written_later():
+    release, written = threading.Event(), []
+
+    def write_batch(rows):
+        release.wait(5)
+        written.extend(rows)
+        return [f"id-{row}" for row in rows]
+
+    writer = GroupCommitWriter(write_batch, max_wait=0)
+    results = {}
+    taken = threading.Thread(target=lambda: results.update(first=writer.submit("first", timeout=0.1)))
+    taken.start()
+    time.sleep(0.05)  # the writer is now blocked inside the first batch
+
+    # Still queued when the wait ends: refused, and dropped rather than written later.
+    with pytest.raises(WriterOverloaded):
+        writer.submit("queued", timeout=0.1)
+    release.set()
+    taken.join()
+
+    # Already taken by the writer when the wait ended: the caller gets the committed result.
+    assert results["first"] == "id-first"
+    time.sleep(0.1)
+    assert written == ["first"]
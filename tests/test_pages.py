@@ -0,0 +1,28 @@
+from client_routes import Client
+
+
+def test_signed_in_users_get_their_own_header(app, make_user, login):
+    alice = make_user(Client, 1, "alice_user")
+    bob = make_user(Client, 2, "bob_user")
+    alice_client, bob_client = app.test_client(), app.test_client()
+    login(alice_client, alice)
+    login(bob_client, bob)
+
+    for path in ("/header", "/"):
+        alice_page = alice_client.get(path)
+        bob_page = bob_client.get(path)
+        assert b"alice_user" in alice_page.data and b"bob_user" not in alice_page.data
+        assert b"bob_user" in bob_page.data and b"alice_user" not in bob_page.data
+        assert alice_page.data != bob_page.data
+        assert "no-store" in bob_page.headers["Cache-Control"]
+
+
+def test_signed_in_users_are_not_sent_the_anonymous_304(app, make_user, login):
+    client = app.test_client()
+    etag = client.get("/header").headers["ETag"]
+    assert client.get("/header", headers={"If-None-Match": etag}).status_code == 304
+
+    login(client, make_user(Client, 1, "alice_user"))
+    page = client.get("/header", headers={"If-None-Match": etag})
+    assert page.status_code == 200
+    assert b"alice_user" in page.data
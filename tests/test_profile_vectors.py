@@ -0,0 +1,48 @@
+import pytest
+
+from extensions import db, profile_index
+from freelancer_routes import Freelancer
+
+# Taglines that say nothing about the work, so the ranking has to come from the listed roles.
+PROFILES = [
+    ("Graphic Designer", "Ten years of experience"),
+    ("Welder", "Reliable and always on time"),
+    ("Full Stack Developer", "Available on weekends"),
+    ("Electrician", "Friendly and affordable"),
+    ("Carpenter", "Ten years of experience"),
+    ("Photographer", "Reliable and always on time"),
+    ("Math Teacher", "Available on weekends"),
+    ("Yoga Instructor", "Friendly and affordable"),
+    ("Interior Designer", "Reliable and always on time"),
+]
+
+
+@pytest.fixture
+def profiles(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_index, "path", str(tmp_path / "profile_vectors.npy"))
+    monkeypatch.setattr(profile_index, "stamp", None)
+    monkeypatch.setattr(profile_index, "table", None)
+    with app.app_context():
+        for i, (roles, tagline) in enumerate(PROFILES, start=1):
+            db.session.add(Freelancer(id=i, username=f"f{i}", email=f"f{i}@example.com", first_name="F",
+                                      last_name=str(i), password="x", roles=roles, tagline=tagline))
+        db.session.commit()
+
+
+@pytest.mark.parametrize("need, expected", [
+    ("design a logo for my startup", "Graphic Designer"),
+    ("photos for my wedding", "Photographer"),
+    ("teach my son calculus", "Math Teacher"),
+    ("I need a yoga teacher", "Yoga Instructor"),
+])
+def test_best_match_is_the_profile_for_the_need(app, profiles, need, expected):
+    cards = app.test_client().get("/match_freelancers", query_string={"need_statement": need}).json["freelancers"]
+    assert cards[0]["roles"] == [expected]
+    assert all(card["similarity"] < cards[0]["similarity"] for card in cards[1:])
+
+
+def test_rebuild_profile_vectors_command(app, profiles):
+    result = app.test_cli_runner().invoke(args=["rebuild-profile-vectors"])
+    assert result.exit_code == 0, result.output
+    assert f"Embedded {len(PROFILES)} freelancer profiles" in result.output
+    assert [i for i, _ in profile_index.search("design a logo for my startup", k=1)] == [1]
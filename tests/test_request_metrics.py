@@ -0,0 +1,41 @@
+import pytest
+from flask import Flask
+
+from request_metrics import RequestMetrics
+
+TOKEN = {"Authorization": "Bearer s3cret"}
+
+
+def make_app(tmp_path, **config):
+    metrics_app = Flask("metrics-test")
+    metrics_app.config.update(METRICS_ENABLED=True, METRICS_PROFILE_DIR=str(tmp_path), **config)
+
+    @metrics_app.route("/page")
+    def page():
+        return "ok"
+
+    RequestMetrics(metrics_app)
+    return metrics_app
+
+
+def test_enabling_without_a_token_is_refused(tmp_path):
+    with pytest.raises(RuntimeError):
+        make_app(tmp_path, METRICS_TOKEN=None)
+
+
+def test_routes_require_the_token(tmp_path):
+    client = make_app(tmp_path, METRICS_TOKEN="s3cret").test_client()
+    assert client.get("/metrics").status_code == 401
+    assert client.post("/metrics/profile?endpoint=page").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers=TOKEN).status_code == 200
+
+
+def test_profile_sort_key_is_validated(tmp_path):
+    client = make_app(tmp_path, METRICS_TOKEN="s3cret").test_client()
+    client.post("/metrics/profile?endpoint=page", headers=TOKEN)
+    name = client.get("/page").headers["X-Profile"]
+    assert client.get(f"/metrics/profile/{name}", headers=TOKEN).status_code == 200
+    assert client.get(f"/metrics/profile/{name}?sort=tottime", headers=TOKEN).status_code == 200
+    assert client.get(f"/metrics/profile/{name}?sort=bogus", headers=TOKEN).status_code == 400
+    assert client.get(f"/metrics/profile/{name}", headers={"Authorization": "Bearer wrong"}).status_code == 401
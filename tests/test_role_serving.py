@@ -0,0 +1,60 @@
+import os
+import threading
+
+import pytest
+
+import app as app_module
+from role_serving import MicroBatcher, RoleService, ServingOverloaded, SidecarHandler, SidecarServer, socket_backend
+
+
+def stalled_service(queue_depth, timeout=1.0):
+    service = RoleService(mode="pool", pool_size=1, queue_depth=queue_depth, timeout=timeout)
+    # Nothing drains the queue, as when every worker is busy.
+    service.batcher.started = True
+    return service
+
+
+def test_batch_calls_count_against_the_queue_depth():
+    service = stalled_service(queue_depth=2)
+    service.batcher.submit_many(["queued single prediction"], 3)
+    with pytest.raises(ServingOverloaded):
+        service.predict_many(["a", "b"], 3)
+    assert service.batcher.rejected == 1
+
+
+def test_batch_calls_time_out_as_overloaded():
+    service = stalled_service(queue_depth=16, timeout=0.05)
+    with pytest.raises(ServingOverloaded):
+        service.predict_many(["a", "b"], 3)
+    assert service.batcher.timeouts == 1
+
+
+def test_sidecar_overload_is_raised_as_serving_overloaded(tmp_path):
+    path = os.path.join(tmp_path, "roles.sock")
+    server = SidecarServer(path, SidecarHandler)
+    server.batcher = MicroBatcher(lambda texts, top_n: [["Role"]] * len(texts), max_queue=1)
+    server.batcher.started = True
+    server.timeout = 1.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(ServingOverloaded):
+            socket_backend(path, timeout=2.0)(["a", "b"], 3)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_batch_endpoint_answers_503_when_overloaded(app, monkeypatch):
+    def overloaded(texts, top_n):
+        raise ServingOverloaded("role prediction queue is full")
+
+    monkeypatch.setattr(app_module.role_service, "predict_many", overloaded)
+    response = app.test_client().post("/predict_roles/batch", json={"need_statements": ["build a website"]})
+    assert response.status_code == 503
+
+
+def test_batches_larger_than_the_queue_go_in_chunks():
+    service = RoleService(mode="pool", pool_size=1, queue_depth=4, timeout=5.0)
+    service.batcher.predict_many = lambda texts, top_n: [[text.upper()] for text in texts]
+    texts = [f"need {i}" for i in range(10)]
+    assert service.predict_many(texts, 3) == [[text.upper()] for text in texts]
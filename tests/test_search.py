@@ -0,0 +1,40 @@
+from app import search_freelancers
+import freelancer_search
+from extensions import db
+from freelancer_routes import Freelancer
+
+
+def test_location_prefix_is_case_insensitive_and_indexed(app):
+    with app.app_context():
+        for i, location in enumerate(["Pune", "Puducherry", "Mumbai", "PUNE West", None], start=1):
+            db.session.add(Freelancer(id=i, username=f"f{i}", email=f"f{i}@example.com", first_name="F",
+                                      last_name=str(i), password="x", location=location))
+        db.session.commit()
+
+        def locations(prefix):
+            rows = search_freelancers(location=prefix)[0]
+            return sorted(f.location for f in rows)
+
+        assert locations("pu") == ["PUNE West", "Puducherry", "Pune"]
+        assert locations("PUNE") == ["PUNE West", "Pune"]
+        assert locations("pune w") == ["PUNE West"]
+        assert locations("x") == []
+
+        plan = db.session.execute(db.text(
+            "EXPLAIN QUERY PLAN SELECT id FROM freelancer WHERE location_key >= 'pu' AND location_key < 'pv'"
+        )).all()
+        assert "ix_freelancer_location_key" in str(plan)
+
+
+def test_rebuild_search_index_command_indexes_existing_rows(app):
+    with app.app_context():
+        db.session.add(Freelancer(id=1, username="f1", email="f1@example.com", first_name="Pat", last_name="Lee",
+                                  password="x", roles="Plumber", tagline="Leaks and pipes", location="Austin"))
+        db.session.commit()
+        assert freelancer_search.search("plumber") == []
+
+    result = app.test_cli_runner().invoke(args=["rebuild-search-index"])
+    assert result.exit_code == 0, result.output
+    assert "Indexed 1 freelancers" in result.output
+    with app.app_context():
+        assert [freelancer_id for freelancer_id, _ in freelancer_search.search("plumber austin")] == [1]